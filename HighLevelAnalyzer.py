@@ -12,58 +12,47 @@ October 2022, version 1.0.0
 Paul van Haastrecht
 
 '''
+import collections
+import functools
+from time import perf_counter_ns
 from saleae.analyzers import HighLevelAnalyzer, AnalyzerFrame, StringSetting, NumberSetting, ChoicesSetting
 
 # Registers with decoders
-HOT_JUNC_TEMP           = '0x0'
-DELTA_JUNC_TEMP         = '0x1'
-COLD_JUNC_TEMP          = '0x2'
-RAW_ADC                 = '0x3'
-SENSOR_STATUS           = '0x4'
-THERMO_SENSOR_CONFIG    = '0x5'
-DEVICE_CONFIG           = '0x6'
-ALERT1_CONFIG           = '0x8'
-ALERT2_CONFIG           = '0x9'
-ALERT3_CONFIG           = '0xa'
-ALERT4_CONFIG           = '0xb'
-ALERT1_HYSTERESIS       = '0xc'
-ALERT2_HYSTERESIS       = '0xd'
-ALERT3_HYSTERESIS       = '0xe'
-ALERT4_HYSTERESIS       = '0xf'
-ALERT1_LIMIT            = '0x10'
-ALERT2_LIMIT            = '0x11'
-ALERT3_LIMIT            = '0x12'
-ALERT4_LIMIT            = '0x13'
-DEVICE_ID               = '0x20'
-
-# all known MCP9600 register names (also those without decoder)
-MCP9600_Registers = {
-    '0x0' : 'HOT_JUNC_TEMP: ',            # read only
-    '0x1' : 'DELTA_JUNC_TEMP: ',          # read only
-    '0x2' : 'COLD_JUNC_TEMP: ',           # read only
-    '0x3' : 'RAW_ADC: ',                  # read only
-    '0x4' : 'SENSOR_STATUS: ',
-    '0x5' : 'THERMO_SENSOR_CONFIG: ',
-    '0x6' : 'DEVICE_CONFIG: ',
-    '0x8' : 'ALERT1_CONFIG: ',
-    '0x9' : 'ALERT2_CONFIG: ',
-    '0xa' : 'ALERT3_CONFIG: ',
-    '0xb' : 'ALERT4_CONFIG: ',
-    '0xc' : 'ALERT1_HYSTERESIS: ',
-    '0xd' : 'ALERT2_HYSTERESIS: ',
-    '0xe' : 'ALERT3_HYSTERESIS: ',
-    '0xf' : 'ALERT4_HYSTERESIS: ',
-    '0x10': 'ALERT1_LIMIT: ',
-    '0x11': 'ALERT2_LIMIT: ',
-    '0x12': 'ALERT3_LIMIT: ',
-    '0x13': 'ALERT4_LIMIT: ',
-    '0x20': 'DEVICE_ID: ',                # read only
-}
+HOT_JUNC_TEMP           = 0x00
+DELTA_JUNC_TEMP         = 0x01
+COLD_JUNC_TEMP          = 0x02
+RAW_ADC                 = 0x03
+SENSOR_STATUS           = 0x04
+THERMO_SENSOR_CONFIG    = 0x05
+DEVICE_CONFIG           = 0x06
+ALERT1_CONFIG           = 0x08
+ALERT2_CONFIG           = 0x09
+ALERT3_CONFIG           = 0x0a
+ALERT4_CONFIG           = 0x0b
+ALERT1_HYSTERESIS       = 0x0c
+ALERT2_HYSTERESIS       = 0x0d
+ALERT3_HYSTERESIS       = 0x0e
+ALERT4_HYSTERESIS       = 0x0f
+ALERT1_LIMIT            = 0x10
+ALERT2_LIMIT            = 0x11
+ALERT3_LIMIT            = 0x12
+ALERT4_LIMIT            = 0x13
+DEVICE_ID               = 0x20
+
+# DEVICE_ID (upper byte) of the members of the MCP960X family
+MCP9600_ID              = 0x40
+MCP9601_ID              = 0x41
 
 ''' JUNC_TEMP '''
 # default for resolution
 DEV_RESOLUTION = 0.0625
 
+''' cache for decoded 16-bit values (JUNC_TEMP / ALERT_LIMIT / DEVICE_ID) '''
+# 'table' : 65536 entry table, an entry is filled the first time that raw value is seen
+# 'lru'   : least recently used cache holding VALUE_CACHE_SIZE raw values
+VALUE_CACHE_MODE = 'table'
+VALUE_CACHE_SIZE = 256
+
 ''' THERMO_SENSOR_CONFIG register '''
 Thermocouple_Type = {
     0b000: 'TYPE_K',
@@ -76,6 +65,13 @@ Thermocouple_Type = {
     0b111: 'TYPE_R'
 }
 
+Filter_Coefficient = {
+    0b00: '(0) Off',
+    0b01: '(1)',
+    0b10: '(2) Minimum',
+    0b11: '(3)'
+}
+
 ''' DEVICE_CONFIG register '''
 Thermocouple_Resolution = {
     0b00: 'RES_18_BIT',
@@ -101,6 +97,763 @@ shutdown_modes = {
     0x02: 'Burst'
 }
 
+# ADC resolution in bits (bits 6:5) and the µV per LSB of RAW_ADC at that resolution
+ADC_Resolution = {
+    0b00: 18,
+    0b01: 16,
+    0b10: 14,
+    0b11: 12
+}
+
+RAW_ADC_LSB = {
+    18: 2.0,
+    16: 8.0,
+    14: 32.0,
+    12: 128.0
+}
+
+Hex_Byte = [hex(b) for b in range(256)]
+
+def junc_temp(reg_data):
+    """ HOT_JUNC_TEMP, DELTA_JUNC_TEMP, COLD_JUNC_TEMP temperature in °C """
+
+    # The Ambient register contains the thermocouple cold-junction temperature or the device ambient temperature
+    # data. Bits 1 and 0 may remain clear (‘0’) depending on the status of the Resolution setting, bit 7 of
+    # Device Config register. As such the resolution calculation stays the same  * 0.0625
+    Temp = reg_data * DEV_RESOLUTION
+
+    # if sign bit(s) is set, the temperature is negative
+    if reg_data & 0x8000:
+        Temp = Temp - 4096
+
+    return Temp
+
+def raw_adc(reg_data, bits):
+    """ RAW_ADC in µV at the ADC resolution (bits) """
+    # 24-bit two's complement
+    if reg_data & 0x800000:
+        reg_data -= 0x1000000
+
+    return reg_data * RAW_ADC_LSB[bits]
+
+def alert_limit(reg_data):
+    """ ALERT1_LIMIT, ALERT2_LIMIT, ALERT3_LIMIT, ALERT4_LIMIT temperature """
+    f = float(reg_data >> 4)
+    if (reg_data & 0x8):
+         f = f + 0.5
+    if (reg_data & 0x4):
+         f = f + 0.25
+
+    return f
+
+class ValueCache:
+    """ Memoize the decoded text of a 16-bit register value, keyed on the raw value """
+
+    def __init__(self, render, mode = None, size = None):
+        self.render = render
+        self.configure(mode, size)
+
+    def configure(self, mode = None, size = None):
+        """ (re)start the cache as 'table' or 'lru' (None : VALUE_CACHE_MODE / VALUE_CACHE_SIZE), the counters start at 0 """
+        mode = VALUE_CACHE_MODE if mode is None else mode
+        size = VALUE_CACHE_SIZE if size is None else size
+
+        if mode == 'table':
+            self.table = [None] * 0x10000
+            self.lookups = 0
+            self.filled = 0
+            self.get = self.get_table
+
+        elif mode == 'lru':
+            self.get = functools.lru_cache(maxsize = size)(self.render)
+
+        else:
+            raise ValueError("unknown value cache mode: " + str(mode))
+
+        self.mode = mode
+        self.size = size
+
+    def get_table(self, reg_data):
+        """ look up a raw value, render it on first use """
+        self.lookups += 1
+        entry = self.table[reg_data]
+
+        if entry is None:
+            entry = self.table[reg_data] = self.render(reg_data)
+            self.filled += 1
+
+        return entry
+
+    @property
+    def hits(self):
+        if self.mode == 'lru':
+            return self.get.cache_info().hits
+        return self.lookups - self.filled
+
+    @property
+    def misses(self):
+        if self.mode == 'lru':
+            return self.get.cache_info().misses
+        return self.filled
+
+''' Register map '''
+# One entry per register: name, width in bytes, kind of value, where the text is shown and the fields.
+#
+# kind   : 'fields' : the text of the bitfields, joined with ", "
+#          'temp', 'limit' : temperature, converted and formatted with Value_Formats
+#          'adc'    : RAW_ADC, the µV depend on the ADC resolution of the device (not precomputed)
+# show   : 'description' / 'text' (description without separator) / 'action'
+# fields : (shift, mask, label, values), the text is label + values.get(field) ("unknown" if not in values)
+#          or label + values(field) when values is a function (hex, str)
+#
+# The map is compiled once at import (see compile_register): the text of each value of an 8-bit
+# register is made up front, 16-bit values are made the first time they are seen (ValueCache).
+# Registers that differ between the members of the family get a decoder per DEVICE_ID.
+Register = collections.namedtuple('Register', ('name', 'width', 'kind', 'show', 'fields'))
+
+def flag(bit, clear, set):
+    """ field of one bit, text when clear / set ('' : not shown) """
+    return (bit, 0x1, '', {0: clear, 1: set})
+
+# kind -> (function raw value to value, text format of the value)
+Value_Formats = {
+    'temp'  : (junc_temp, "Temp: {:.2f}°C"),
+    'limit' : (alert_limit, "Limit: {}"),
+}
+
+Alert_Config_Fields = (
+    flag(0, "Alert disabled", "Alert enabled"),
+    flag(1, "Comparator_mode", "Interrupt_mode:"),
+    flag(2, "Active_low", "Active_high"),
+    flag(3, "Alert on rising", "Alert on falling"),
+    flag(4, "Monitor: T_H thermocouple", "Monitor: T_C cold-junction"),
+    flag(7, "Cleared interrupt", "Clears interrupt"),
+)
+
+Hysteresis_Fields = (
+    (0, 0xff, "hysteresis: ", str),
+)
+
+MCP9600_Map = {
+    HOT_JUNC_TEMP        : Register('HOT_JUNC_TEMP', 2, 'temp', 'description', None),          # read only
+    DELTA_JUNC_TEMP      : Register('DELTA_JUNC_TEMP', 2, 'temp', 'description', None),        # read only
+    COLD_JUNC_TEMP       : Register('COLD_JUNC_TEMP', 2, 'temp', 'description', None),         # read only
+    RAW_ADC              : Register('RAW_ADC', 3, 'adc', 'text', None),                        # read only
+    SENSOR_STATUS        : Register('SENSOR_STATUS', 1, 'fields', 'action', (
+                                flag(0, "TX < AL1", "TX > AL1"),
+                                flag(1, "TX < AL2", "TX > AL2"),
+                                flag(2, "TX < AL3", "TX > AL3"),
+                                flag(3, "TX < AL4", "TX > AL4"),
+                                flag(4, "EMF OK", "EMF error"),
+                                flag(5, "", "Thermocouple Shorted"),
+                                flag(6, "", "conversion complete"),
+                                flag(7, "", "Burst complete"),
+                            )),
+    THERMO_SENSOR_CONFIG : Register('THERMO_SENSOR_CONFIG', 1, 'fields', 'description', (
+                                (4, 0x7, "Type: ", Thermocouple_Type),
+                                (0, 0x3, "filter", Filter_Coefficient),
+                            )),
+    DEVICE_CONFIG        : Register('DEVICE_CONFIG', 1, 'fields', 'action', (
+                                flag(7, "Cold Res: 0.0625", "Cold Res: 0.25"),
+                                (5, 0x3, "Hot Res: ", Thermocouple_Resolution),
+                                (2, 0x3, "", Burst_Sample),
+                                (0, 0x3, "Shutdown: ", shutdown_modes),
+                            )),
+    ALERT1_CONFIG        : Register('ALERT1_CONFIG', 1, 'fields', 'action', Alert_Config_Fields),
+    ALERT2_CONFIG        : Register('ALERT2_CONFIG', 1, 'fields', 'action', Alert_Config_Fields),
+    ALERT3_CONFIG        : Register('ALERT3_CONFIG', 1, 'fields', 'action', Alert_Config_Fields),
+    ALERT4_CONFIG        : Register('ALERT4_CONFIG', 1, 'fields', 'action', Alert_Config_Fields),
+    ALERT1_HYSTERESIS    : Register('ALERT1_HYSTERESIS', 1, 'fields', 'description', Hysteresis_Fields),
+    ALERT2_HYSTERESIS    : Register('ALERT2_HYSTERESIS', 1, 'fields', 'description', Hysteresis_Fields),
+    ALERT3_HYSTERESIS    : Register('ALERT3_HYSTERESIS', 1, 'fields', 'description', Hysteresis_Fields),
+    ALERT4_HYSTERESIS    : Register('ALERT4_HYSTERESIS', 1, 'fields', 'description', Hysteresis_Fields),
+    ALERT1_LIMIT         : Register('ALERT1_LIMIT', 2, 'limit', 'description', None),
+    ALERT2_LIMIT         : Register('ALERT2_LIMIT', 2, 'limit', 'description', None),
+    ALERT3_LIMIT         : Register('ALERT3_LIMIT', 2, 'limit', 'description', None),
+    ALERT4_LIMIT         : Register('ALERT4_LIMIT', 2, 'limit', 'description', None),
+    DEVICE_ID            : Register('DEVICE_ID', 2, 'fields', 'text', (                     # read only
+                                (8, 0xff, "", hex),
+                                (4, 0xf, "Maj: ", hex),
+                                (0, 0xf, "Min: ", hex),
+                            )),
+}
+
+# MCP9601: open / short circuit detection in SENSOR_STATUS
+MCP9601_Map = dict(MCP9600_Map)
+MCP9601_Map[SENSOR_STATUS] = Register('SENSOR_STATUS', 1, 'fields', 'action', (
+                                flag(0, "TX < AL1", "TX > AL1"),
+                                flag(1, "TX < AL2", "TX > AL2"),
+                                flag(2, "TX < AL3", "TX > AL3"),
+                                flag(3, "TX < AL4", "TX > AL4"),
+                                flag(4, "", "Open circuit"),
+                                flag(5, "", "Short circuit"),
+                                flag(6, "", "conversion complete"),
+                                flag(7, "", "Burst complete"),
+                            ))
+
+# DEVICE_ID -> register map, devices are decoded with MCP9600_Map until their DEVICE_ID is read
+Register_Maps = {
+    MCP9600_ID : MCP9600_Map,
+    MCP9601_ID : MCP9601_Map,
+}
+
+def field_text(field, value):
+    """ text of one field of a register value """
+    shift, mask, label, values = field
+    value = (value >> shift) & mask
+
+    text = values(value) if callable(values) else values.get(value, "unknown")
+    return label + text if text else ""
+
+def register_text(spec, reg_data):
+    """ (description, action, data) text of a register value, action None if the register has no action """
+    if spec.kind == 'fields':
+        text = ", ".join(t for t in (field_text(field, reg_data) for field in spec.fields) if t)
+    else:
+        convert, text_format = Value_Formats[spec.kind]
+        text = text_format.format(convert(reg_data))
+
+    head = spec.name + ": "
+    if spec.show == 'action':
+        return head, text, hex(reg_data)
+    if spec.show == 'description':
+        return head + ", " + text, None, hex(reg_data)
+    return head + text, None, hex(reg_data)
+
+def compile_register(spec, caches = None, key = None):
+    '''
+    Decoder function (hla, reg_data) of a register of the map.
+
+    The text is looked up (8-bit: table of all values, 16-bit: ValueCache, added to caches[key]) and added
+    to the transaction of the Hla in one go, the same as the add_description / add_action / add_data calls would.
+    '''
+    width = spec.width
+
+    if spec.kind == 'adc':
+        head = spec.name + ": Raw: "
+
+        def decode_adc(hla, reg_data):
+            tr = hla.transaction
+            if tr.has_description:
+                tr.description.append(", ")
+            tr.description.append(head + str(reg_data))
+            tr.has_description = True
+            hla.data_unknown = False
+
+            # scaled with the ADC resolution of DEVICE_CONFIG, once that was written or read
+            bits = hla.device.adc_bits
+            if bits is not None:
+                tr.description.append(", " + "{:.0f}".format(raw_adc(reg_data, bits)) + "µV (" + str(bits) + " bit)")
+
+            tr.data.append(hex(reg_data))
+            tr.has_data = True
+            tr.count += width
+
+        return decode_adc
+
+    render = functools.partial(register_text, spec)
+    table = cache = None
+    if width == 1:
+        table = [render(data_byte) for data_byte in range(256)]
+    else:
+        cache = ValueCache(render)
+        if caches is not None:
+            caches[key] = cache
+
+    def decode(hla, reg_data):
+        # cache.get is looked up for every value, the cache can be configured again (set_value_cache)
+        description, action, data = table[reg_data] if cache is None else cache.get(reg_data)
+
+        tr = hla.transaction
+        if tr.has_description:
+            tr.description.append(", ")
+        tr.description.append(description)
+        tr.has_description = True
+        hla.data_unknown = False
+
+        if action is not None:
+            if tr.has_action:
+                tr.action.append(", ")
+            tr.action.append(action)
+            if action:
+                tr.has_action = True
+
+        tr.data.append(data)
+        tr.has_data = True
+        tr.count += width
+
+    return decode
+
+def compile_decoders(maps = Register_Maps, default = MCP9600_ID, caches = None):
+    '''
+    register -> (decoder function (hla, reg_data), width) for all registers of the default map.
+    A register that is not the same in all maps selects the decoder with the DEVICE_ID of the device.
+    caches : dict the ValueCache of the 16-bit registers are added to, key register or (register, DEVICE_ID) of a variant
+    '''
+    decoders = {}
+    for register, spec in maps[default].items():
+        decoder = compile_register(spec, caches, register)
+
+        variants = {chip: compile_register(family[register], caches, (register, chip)) for chip, family in maps.items()
+                    if family.get(register, spec) != spec}
+        if variants:
+            variants[default] = decoder
+            decoder = functools.partial(decode_variant, variants, decoder)
+
+        decoders[register] = (decoder, spec.width)
+
+    return decoders
+
+def decode_variant(variants, default, hla, reg_data):
+    """ decoder of the register map of the device """
+    variants.get(hla.device.chip, default)(hla, reg_data)
+
+# ValueCache of the decoded 16-bit register values, register -> ValueCache
+Value_Caches = {}
+
+# decoder function (hla, reg_data) and register width in bytes
+# registers not in this list get their raw data bytes displayed
+REGISTER_DECODERS = compile_decoders(caches = Value_Caches)
+
+# all known MCP9600 register names, as added to the description of a frame
+MCP9600_Registers = {register: spec.name + ": " for register, spec in MCP9600_Map.items()}
+
+# register names as shown in the register field of a frame
+Register_Names = {register: spec.name for register, spec in MCP9600_Map.items()}
+Register_Numbers = {name: register for register, name in Register_Names.items()}
+
+def set_value_cache(mode, size = None):
+    ''' use another kind of cache ('table' / 'lru', size : entries of 'lru') for the decoded 16-bit values, from now on '''
+    global VALUE_CACHE_MODE, VALUE_CACHE_SIZE
+    for cache in Value_Caches.values():
+        cache.configure(mode, size)
+
+    VALUE_CACHE_MODE = mode
+    if size is not None:
+        VALUE_CACHE_SIZE = size
+
+def cache_stats():
+    ''' hits and misses of the value caches, register name -> dict '''
+    stats = {}
+    for key, cache in Value_Caches.items():
+        register, chip = key if isinstance(key, tuple) else (key, None)
+        name = Register_Names.get(register, hex(register)) + ("" if chip is None else " " + hex(chip))
+        stats[name] = {"mode": cache.mode, "hits": cache.hits, "misses": cache.misses}
+    return stats
+
+# Frame text : raw fields, method name in Hla that stores the register value instead of the decoder
+# registers with a decoder of another kind only get the raw value stored
+FIELD_DECODERS = {
+    'temp'  : 'field_temp',
+    'limit' : 'field_limit',
+    'adc'   : 'field_adc',
+}
+
+def register_order(item):
+    ''' sort key of (register, value) items, no register (None) first '''
+    return -1 if item[0] is None else item[0]
+
+class Device:
+    ''' Decode state of one device on the bus (I2C address), carried from one transaction to the next '''
+
+    __slots__ = ('address', 'ObtainMode', 'request_register_type', 'reg_data', 'reg_count', 'changes', 'summaries',
+                 'shadow', 'adc_bits', 'chip', 'skip_responds')
+
+    def __init__(self, address = None):
+        self.address = address              # I2C address, None : transactions without address
+        self.ObtainMode = False             # True : Assume a register read request was send
+        self.request_register_type = None   # Hold a register that has an assumed read requested pending
+        self.reg_data = 0                   # needed to read 16/32-bit registers
+        self.reg_count = 0                  # needed to read 16/32-bit registers
+        self.changes = {}                   # changes only: register -> [data, temp, repeats, first start, last end]
+        self.summaries = {}                 # temperature summary: register -> Summary
+        self.shadow = {}                    # configuration register -> last value written or read
+        self.adc_bits = None                # ADC resolution of the shadow DEVICE_CONFIG, None : not known
+        self.chip = None                    # DEVICE_ID of the register map (Register_Maps), None : not read (MCP9600)
+        self.skip_responds = False          # True : the next read is the responds of a register that is filtered out
+
+    def get_state(self):
+        ''' the pending read register only matters while in ObtainMode '''
+        changes = tuple(sorted(((register, tuple(last)) for register, last in self.changes.items()), key = register_order))
+        summaries = tuple(sorted((register, summary.get_state()) for register, summary in self.summaries.items()))
+        shadow = tuple(sorted(self.shadow.items()))
+        return (self.ObtainMode, self.request_register_type if self.ObtainMode else None, self.reg_data, self.reg_count, changes, summaries, shadow,
+                self.chip, self.skip_responds)
+
+    def set_state(self, state):
+        self.ObtainMode, self.request_register_type, self.reg_data, self.reg_count, changes, summaries, shadow, self.chip, self.skip_responds = state
+        self.shadow = dict(shadow)
+        self.adc_bits = None
+        if DEVICE_CONFIG in self.shadow:
+            self.adc_bits = ADC_Resolution[(self.shadow[DEVICE_CONFIG] >> 5) & 0x3]
+        self.changes = {register: list(last) for register, last in changes}
+        self.summaries = {}
+        for register, summary_state in summaries:
+            self.summaries[register] = Summary()
+            self.summaries[register].set_state(summary_state)
+
+class Summary:
+    ''' Rolling statistics of the temperature readings of one register, O(1) per reading '''
+
+    __slots__ = ('count', 'min', 'max', 'mean', 'ewma', 'start', 'first_time', 'first_temp', 'last_time', 'last_temp')
+
+    def __init__(self):
+        self.ewma = None                    # over all readings, not reset with the window
+        self.reset()
+
+    def reset(self):
+        ''' start a new window '''
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self.start = None                   # start time of the first transaction in the window
+        self.first_time = self.first_temp = None
+        self.last_time = self.last_temp = None
+
+    def add(self, start_time, temp):
+        if self.count == 0:
+            self.start = start_time
+            self.first_time = start_time
+            self.first_temp = temp
+            self.min = self.max = temp
+        elif temp < self.min:
+            self.min = temp
+        elif temp > self.max:
+            self.max = temp
+
+        self.count += 1
+        self.mean += (temp - self.mean) / self.count
+        self.ewma = temp if self.ewma is None else self.ewma + SUMMARY_EWMA_ALPHA * (temp - self.ewma)
+        self.last_time = start_time
+        self.last_temp = temp
+
+    def frame_data(self, end_time):
+        ''' statistics of the window as frame data '''
+        span = float(end_time - self.start)
+        dt = float(self.last_time - self.first_time)
+        rate = (self.last_temp - self.first_temp) / dt if dt > 0 else 0.0
+
+        return {
+            "samples": self.count,
+            "min": round(self.min, 4),
+            "max": round(self.max, 4),
+            "mean": round(self.mean, 4),
+            "ewma": round(self.ewma, 4),
+            "rate": round(rate, 4),             # °C / s over the window
+            "span": span,
+        }
+
+    def get_state(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def set_state(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+class Metrics:
+    ''' Bus timing and polling efficiency of the decoded transactions in a window, a few additions per transaction '''
+
+    __slots__ = ('start', 'end', 'busy', 'transactions', 'reads', 'unchanged', 'register_reads',
+                 'latency_count', 'latency_sum', 'latency_max')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        ''' start a new window '''
+        self.start = None                   # start time of the first transaction in the window
+        self.end = None                     # end time of the last transaction in the window
+        self.busy = 0.0                     # seconds the bus was used by the transactions
+        self.transactions = 0
+        self.reads = 0                      # register reads (responds)
+        self.unchanged = 0                  # register reads with the same value as the previous read
+        self.register_reads = {}            # register -> reads
+        self.latency_count = 0              # temperature ready (SENSOR_STATUS) -> HOT_JUNC_TEMP read
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def add(self, other):
+        ''' add the counts of another window '''
+        if other.start is None:
+            return
+        if self.start is None:
+            self.start = other.start
+        self.end = other.end
+        self.busy += other.busy
+        self.transactions += other.transactions
+        self.reads += other.reads
+        self.unchanged += other.unchanged
+        for register, reads in other.register_reads.items():
+            self.register_reads[register] = self.register_reads.get(register, 0) + reads
+        self.latency_count += other.latency_count
+        self.latency_sum += other.latency_sum
+        self.latency_max = max(self.latency_max, other.latency_max)
+
+    def frame_data(self, end_time):
+        ''' metrics of the window as frame data, with a description '''
+        span = float(end_time - self.start)
+        occupancy = 100.0 * self.busy / span if span > 0 else 0.0
+        unchanged = 100.0 * self.unchanged / self.reads if self.reads else 0.0
+        latency = 1000.0 * self.latency_sum / self.latency_count if self.latency_count else 0.0
+
+        polling = []
+        for register, reads in sorted(self.register_reads.items(), key = register_order):
+            rate = reads / span if span > 0 else 0.0
+            polling.append(Register_Names.get(register, "unknown") + " " + "{:.1f}".format(rate) + "/s")
+
+        desc = str(self.transactions) + " transactions, bus " + "{:.2f}".format(occupancy) + "%, "
+        desc += str(self.reads) + " reads, " + "{:.1f}".format(unchanged) + "% unchanged"
+        if self.latency_count:
+            desc += ", ready to read " + "{:.3f}".format(latency) + " ms (max " + "{:.3f}".format(1000.0 * self.latency_max) + " ms)"
+        if polling:
+            desc += ", " + ", ".join(polling)
+
+        return {
+            "description": desc,
+            "transactions": self.transactions,
+            "occupancy": round(occupancy, 4),               # % of the window
+            "reads": self.reads,
+            "unchanged": self.unchanged,
+            "unchanged_pct": round(unchanged, 2),
+            "latency_mean": round(latency, 4),              # ms
+            "latency_max": round(1000.0 * self.latency_max, 4),
+            "latency_count": self.latency_count,
+            "polling": ", ".join(polling),
+            "span": span,
+        }
+
+    def get_state(self):
+        state = [getattr(self, name) for name in self.__slots__]
+        state[self.__slots__.index('register_reads')] = tuple(sorted(self.register_reads.items(), key = register_order))
+        return tuple(state)
+
+    def set_state(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+        self.register_reads = dict(self.register_reads)
+
+class Histogram:
+    ''' Call times in ns, counted in power of 2 buckets (bucket b : below 2**b ns) '''
+
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.buckets = [0] * 48
+
+    def add(self, ns):
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+        self.buckets[ns.bit_length()] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def quantile(self, q):
+        ''' upper bound (ns) of the bucket holding the q quantile '''
+        limit = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= limit:
+                return 1 << bucket
+        return 0
+
+    def report(self):
+        ''' dict with the counts and times in µs '''
+        return {
+            "count": self.count,
+            "total_us": round(self.total / 1000.0, 3),
+            "mean_us": round(self.total / self.count / 1000.0, 3) if self.count else 0.0,
+            "p50_us": self.quantile(0.5) / 1000.0,
+            "p90_us": self.quantile(0.9) / 1000.0,
+            "p99_us": self.quantile(0.99) / 1000.0,
+            "max_us": round(self.max / 1000.0, 3),
+            "buckets": {str(1 << bucket): count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+class Stats:
+    '''
+    Decode instrumentation of a window: frames and decode() time per input frame type, transactions per
+    register, calls and time per register decoder. Only made when instrumentation is on (Hla.instrument).
+    '''
+
+    __slots__ = ('start', 'end', 'frames', 'decoders', 'transactions')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        ''' start a new window '''
+        self.start = None                   # start time of the first frame in the window
+        self.end = None                     # end time of the last transaction in the window
+        self.frames = {}                    # input frame type -> Histogram of decode()
+        self.decoders = {}                  # register -> Histogram of the register decoder
+        self.transactions = {}              # register -> transactions (None : no register)
+
+    def add(self, other):
+        ''' add the counts of another window '''
+        if other.start is None:
+            return
+        if self.start is None:
+            self.start = other.start
+        self.end = other.end
+        for mine, theirs in ((self.frames, other.frames), (self.decoders, other.decoders)):
+            for key, histogram in theirs.items():
+                if key not in mine:
+                    mine[key] = Histogram()
+                mine[key].merge(histogram)
+        for register, count in other.transactions.items():
+            self.transactions[register] = self.transactions.get(register, 0) + count
+
+    def decoder_name(self, register):
+        return Register_Names.get(register, hex(register))
+
+    def frame_data(self, end_time):
+        ''' stats of the window as frame data, with a description; registers with the most decoder time first '''
+        frames = sum(histogram.count for histogram in self.frames.values())
+        decode_time = sum(histogram.total for histogram in self.frames.values())
+        mean = decode_time / frames / 1000.0 if frames else 0.0
+
+        types = ", ".join(type + " " + str(histogram.count) for type, histogram in self.frames.items())
+
+        registers = []
+        for register, histogram in sorted(self.decoders.items(), key = lambda item: -item[1].total):
+            registers.append(self.decoder_name(register) + " " + str(histogram.count) + "x " +
+                             "{:.2f}".format(histogram.total / histogram.count / 1000.0) + "µs (p99 " +
+                             "{:g}".format(histogram.quantile(0.99) / 1000.0) + "µs)")
+
+        transactions = sum(self.transactions.values())
+
+        desc = str(frames) + " frames (" + types + "), decode " + "{:.2f}".format(mean) + "µs/frame, "
+        desc += str(transactions) + " transactions"
+        if registers:
+            desc += ", " + ", ".join(registers)
+
+        return {
+            "description": desc,
+            "frames": frames,
+            "frame_types": types,
+            "decode_us": round(mean, 3),                    # mean decode() time per frame
+            "transactions": transactions,
+            "registers": ", ".join(registers),
+            "span": float(end_time - self.start),
+        }
+
+    def report(self):
+        ''' all counts and histograms as dict (JSON), for the dump at the end of an offline run '''
+        return {
+            "frames": {type: histogram.report() for type, histogram in self.frames.items()},
+            "decoders": {self.decoder_name(register): histogram.report()
+                         for register, histogram in sorted(self.decoders.items(), key = lambda item: -item[1].total)},
+            "transactions": {Register_Names.get(register, "none" if register is None else hex(register)): count
+                             for register, count in sorted(self.transactions.items(), key = register_order)},
+        }
+
+class Transaction:
+    '''
+    The I2C transaction being decoded, one instance is reused for all transactions.
+    The description, action and data text are collected as parts and only joined when
+    the output frame is created at the stop.
+    '''
+
+    __slots__ = ('active', 'start_time', 'end_time', 'address', 'read', 'ack', 'count',
+                 'description', 'action', 'data', 'has_description', 'has_action', 'has_data',
+                 'error', 'value', 'temp', 'adc', 'adc_bits', 'expected')
+
+    def __init__(self):
+        self.description = []
+        self.action = []
+        self.data = []
+        self.reset()
+
+    def reset(self):
+        self.active = False                 # True : a frame of this transaction was received
+        self.start_time = None
+        self.end_time = None
+        self.address = "error"              # address text, until the address is received
+        self.read = None                    # None : no address received
+        self.ack = None
+        self.count = 0
+        self.description.clear()
+        self.action.clear()
+        self.data.clear()
+        self.has_description = False        # True : the joined text is not empty
+        self.has_action = False
+        self.has_data = False
+        self.error = False                  # raw fields: an error frame was received
+        self.value = None                   # raw fields: register value (or data bytes)
+        self.temp = None                    # raw fields: temperature of the register value
+        self.adc = None                     # raw fields: RAW_ADC in µV at the ADC resolution (adc_bits)
+        self.adc_bits = None
+        self.expected = None                # value in the register shadow, when a read returned a different value
+
+    def frame(self, type = "hi2c"):
+        ''' create the output frame '''
+        data = {
+            "address": self.address,
+            "description": "".join(self.description),
+            "data": "".join(self.data),
+            "action": "".join(self.action),
+            "count": self.count,
+        }
+        if self.read is not None:
+            data["read"] = self.read
+            data["ack"] = self.ack              # true if ACK else NACK
+
+        return AnalyzerFrame(type, self.start_time, self.end_time, data)
+
+# state of a device that has not been seen yet
+DEVICE_RESET_STATE = Device().get_state()
+
+# address filter setting, name -> I2C addresses that are decoded
+Address_Filters = {
+    'All addresses'         : range(0x00, 0x100),
+    'MCP9600 (0x60 - 0x67)' : range(0x60, 0x68),
+}
+for address in range(0x60, 0x68):
+    Address_Filters[hex(address)] = (address,)
+
+# register read setting
+READ_SEPARATE   = 'Separate frames'
+READ_MERGED     = 'Merged frame'
+
+# frames setting
+EMIT_ALL        = 'All frames'
+EMIT_CHANGES    = 'Changes only'
+
+# temperature summary setting
+SUMMARY_OFF         = 'Off'
+SUMMARY_ALONGSIDE   = 'Alongside reads'
+SUMMARY_INSTEAD     = 'Instead of reads'
+
+# frame text setting
+TEXT_DECODED    = 'Decoded text'
+TEXT_FIELDS     = 'Raw fields (fast)'
+
+# weight of a new reading in the exponentially weighted moving average of a summary
+SUMMARY_EWMA_ALPHA = 0.1
+
+# registers the deadband of changes only and the temperature summary apply to
+Temperature_Registers = (HOT_JUNC_TEMP, DELTA_JUNC_TEMP, COLD_JUNC_TEMP)
+
+# SENSOR_STATUS bits that report a new temperature: conversion complete, Burst complete
+STATUS_READY = 0x40 | 0x80
+
+# registers that only change when written, these are kept in the register shadow of a device
+Config_Registers = (THERMO_SENSOR_CONFIG, DEVICE_CONFIG,
+                    ALERT1_CONFIG, ALERT2_CONFIG, ALERT3_CONFIG, ALERT4_CONFIG,
+                    ALERT1_HYSTERESIS, ALERT2_HYSTERESIS, ALERT3_HYSTERESIS, ALERT4_HYSTERESIS,
+                    ALERT1_LIMIT, ALERT2_LIMIT, ALERT3_LIMIT, ALERT4_LIMIT)
+
 # High level analyzers must subclass the HighLevelAnalyzer class.
 class Hla(HighLevelAnalyzer):
 
@@ -123,18 +876,71 @@ class Hla(HighLevelAnalyzer):
             },
             "resp": {
                 'format': '{{data.description}} data[{{data.count}}]: [ {{data.data}} ]'
+            },
+            "readreg": {
+                'format': '{{data.description}} {{data.action}} [ {{data.data}} ]'
+            },
+            "change": {
+                'format': '{{data.description}} {{data.action}} [ {{data.data}} ] was [ {{data.previous}} ] {{data.repeats}}x in {{data.span}}s'
+            },
+            "repeat": {
+                'format': '{{data.register}} [ {{data.data}} ] {{data.repeats}}x in {{data.span}}s'
+            },
+            "summary": {
+                'format': '{{data.register}} {{data.samples}} reads in {{data.span}}s: min {{data.min}} max {{data.max}} mean {{data.mean}} ewma {{data.ewma}} rate {{data.rate}}°C/s'
+            },
+            # Frame text : raw fields, the text is only made here when a frame is displayed
+            "field": {
+                'format': '{{data.register}} [ {{data.data}} ]'
+            },
+            "field_temp": {
+                'format': '{{data.register}} {{data.temp}}°C [ {{data.data}} ]'
+            },
+            "field_read": {
+                'format': 'Obtain {{data.register}}'
+            },
+            "field_change": {
+                'format': '{{data.register}} [ {{data.data}} ] was [ {{data.previous}} ] {{data.repeats}}x in {{data.span}}s'
+            },
+            "field_error": {
+                'format': 'error {{data.register}} [ {{data.data}} ]'
+            },
+            "metrics": {
+                'format': '{{data.description}}'
+            },
+            "metrics_report": {
+                'format': 'Report: {{data.description}}'
+            },
+            "stats": {
+                'format': 'Stats: {{data.description}}'
             }
     }
 
-    temp_frame = None               # Working frame to build output
+    # Settings
+    address_filter = ChoicesSetting(label='Addresses', choices=tuple(Address_Filters))
+    registers_include = StringSetting(label='Only registers (e.g. HOT_JUNC_TEMP, SENSOR_STATUS), empty : all')
+    registers_exclude = StringSetting(label='Not registers (e.g. ALERT1_LIMIT, DEVICE_ID)')
+    read_frames = ChoicesSetting(label='Register read', choices=(READ_SEPARATE, READ_MERGED))
+    emit_frames = ChoicesSetting(label='Frames', choices=(EMIT_ALL, EMIT_CHANGES))
+    deadband = NumberSetting(label='Deadband temperature (°C), changes only', min_value=0, max_value=100)
+    summary = ChoicesSetting(label='Temperature summary', choices=(SUMMARY_OFF, SUMMARY_ALONGSIDE, SUMMARY_INSTEAD))
+    summary_reads = NumberSetting(label='Summary every N reads (0 : not used)', min_value=0, max_value=1000000)
+    summary_interval = NumberSetting(label='Summary every T seconds (0 : not used)', min_value=0, max_value=86400)
+    frame_text = ChoicesSetting(label='Frame text', choices=(TEXT_DECODED, TEXT_FIELDS))
+    metrics_interval = NumberSetting(label='Bus metrics every T seconds (0 : off)', min_value=0, max_value=86400)
+    stats_interval = NumberSetting(label='Decode stats every T seconds (0 : off)', min_value=0, max_value=86400)
+
+    transaction = None              # Transaction to build output
     register_type = None            # holds the register read or written
     data_byte = 0                   # holds the most recent data read
-    ObtainMode = False              # True : Assume a register read request was send
     data_unknown = True             # True : No additional data received (indicating read request)
-    request_register_type = None    # Hold a register that has an assumed read requested pending
+    reg_value = None                # most recent (complete) register value of the transaction
+    skip = False                    # True : transaction to an address or register that is filtered out
+    skip_request = None             # register of a skipped transaction that may be a read request (only the pointer)
 
-    reg_data = 0                    # needed to read 16/32-bit registers
-    reg_count = 0                   # needed to read 16/32-bit registers
+    device = None                   # Device addressed by the current transaction
+    pending_read = None             # Merged frame mode: read request frame waiting for the responds
+    last_stop = None                # end of the last stop (also of skipped transactions), metrics and stats frames start here
 
     def __init__(self):
         '''
@@ -142,469 +948,1008 @@ class Hla(HighLevelAnalyzer):
 
         Settings can be accessed using the same name used above.
         '''
-        pass
-
-    def decode(self, frame: AnalyzerFrame):
-        '''
-        Process a frame from the input analyzer, and optionally return a single `AnalyzerFrame` or a list of `AnalyzerFrame`s.
-
-        The type and data values in `frame` will depend on the input analyzer.
-        '''
-        # set our frame to an error frame, which will eventually get over-written as we get data.
-        if self.temp_frame is None:
-            self.temp_frame = AnalyzerFrame("hi2c", frame.start_time, frame.end_time, {
-                    "address": "error",
-                    "description" :"",
-                    "data" : "",
-                    "action" :"",
-                    "count": 0
-                }
-            )
+        self.transaction = Transaction()
 
-        if frame.type == "error":
-            self.temp_frame.data["description"] = "error"
-
-        if frame.type == "address":
-            address_byte = frame.data["address"][0]
-            self.temp_frame.data["address"] = hex(address_byte)
-            self.temp_frame.data["read"] = frame.data["read"]
-            self.temp_frame.data["ack"] = frame.data["ack"]     # true if ACK else NACK
+        # dispatch table: register pointer -> (bound decoder, register width in bytes)
+        self.text_decoders = [(self.add_databyte, 1)] * 256
 
-        if frame.type == "data":
-            self.data_byte = frame.data["data"][0]
+        for register, (decoder, width) in REGISTER_DECODERS.items():
+            self.text_decoders[register] = (functools.partial(decoder, self), width)
 
-            # if waiting on responds from an assumed read request
-            if self.ObtainMode == True:
-                # restore the saved register to (potentially) decode the responds
-                self.register_type = self.request_register_type
+        # frames with the raw register fields only, no text is made while decoding (see describe())
+        self.fields_only = self.frame_text == TEXT_FIELDS
 
-            # no register known yet
-            if self.register_type == None:
-                self.register_type = hex(self.data_byte)
+        if self.fields_only:
+            self.decoders = [(self.field_byte, 1)] * 256
 
-            # select decoder for register (if available)
+            for register, (decoder, width) in REGISTER_DECODERS.items():
+                field = getattr(self, FIELD_DECODERS.get(MCP9600_Map[register].kind, 'field_value'))
+                self.decoders[register] = (functools.partial(field, width), width)
+        else:
+            self.decoders = list(self.text_decoders)
+
+        # configuration registers are kept in the register shadow of the device after decoding
+        for register in Config_Registers:
+            decoder, width = self.decoders[register]
+            self.decoders[register] = (functools.partial(self.shadow_value, decoder, width), width)
+
+        # the DEVICE_ID read selects the register map of the device (MCP9600 / MCP9601)
+        decoder, width = self.decoders[DEVICE_ID]
+        self.decoders[DEVICE_ID] = (functools.partial(self.identify, decoder), width)
+
+        # decode state per I2C address, transactions without address use no_address
+        self.devices = [None] * 256
+        self.no_address = Device()
+        self.device = self.no_address
+
+        # addresses to decode
+        self.accept = [False] * 256
+        for address in Address_Filters.get(self.address_filter, Address_Filters['All addresses']):
+            self.accept[address] = True
+
+        # registers to decode, checked when the register pointer arrives
+        include = self.register_setting(self.registers_include)
+        self.registers = [not include] * 256
+        for register in include:
+            self.registers[register] = True
+        for register in self.register_setting(self.registers_exclude):
+            self.registers[register] = False
+
+        # one frame for a register read request and its responds
+        self.merge_reads = self.read_frames == READ_MERGED
+
+        # only output a register access if the value changed
+        self.changes_only = self.emit_frames == EMIT_CHANGES
+        self.deadband_temp = self.number_setting(self.deadband) if self.changes_only else 0.0
+
+        # summary frame of the temperature readings every N reads and / or T seconds
+        self.summaries = self.summary in (SUMMARY_ALONGSIDE, SUMMARY_INSTEAD)
+        self.summary_only = self.summary == SUMMARY_INSTEAD
+        self.summary_count = int(self.number_setting(self.summary_reads))
+        self.summary_time = self.number_setting(self.summary_interval)
+        if self.summaries and self.summary_count <= 0 and self.summary_time <= 0:
+            self.summaries = self.summary_only = False
+
+        # a read request is held until it is known whether the responds is output
+        self.hold_reads = self.merge_reads or self.changes_only or self.summary_only
+
+        # changes only / summary only: a read request is only shown with its responds
+        self.unpaired_reads = not (self.changes_only or self.summary_only)
+
+        # bus metrics every T seconds, window and whole capture, per address the metrics_device() list
+        self.metrics_time = self.number_setting(self.metrics_interval)
+        self.metrics = Metrics() if self.metrics_time > 0 else None
+        self.metrics_total = Metrics()
+        self.metrics_devices = {}
+
+        # decode instrumentation, a stats frame every T seconds (last, all dispatch table entries are wrapped)
+        self.stats_time = self.number_setting(self.stats_interval)
+        self.stats = None
+        if self.stats_time > 0:
+            self.instrument()
 
-            elif self.register_type == HOT_JUNC_TEMP:
-                self.decode_JUNC_TEMP(self.data_byte)
+    def decode(self, frame: AnalyzerFrame):
+        '''
+        Process a frame from the input analyzer, and optionally return a single `AnalyzerFrame` or a list of `AnalyzerFrame`s.
 
-            elif self.register_type == COLD_JUNC_TEMP:
-                self.decode_JUNC_TEMP(self.data_byte)
+        The type and data values in `frame` will depend on the input analyzer.
+        '''
+        # transaction to an address that is filtered out, skip it until the stop
+        if self.skip:
+            new_frame = None
+
+            if frame.type == "data":
+                self.skip_request = None
+
+            elif frame.type == "stop":
+                self.last_stop = frame.end_time
+
+                # only the pointer of a register that is filtered out: a read request, skip its responds too
+                if self.skip_request is not None:
+                    device = self.device
+                    device.skip_responds = True
+                    device.ObtainMode = False
+                    self.skip_request = None
+
+                    # a read request of the device that is held can not be paired any more, output it
+                    if self.pending_read is not None and self.pending_read[1] is device:
+                        new_frame = self.release_read()
+
+                self.skip = False
+                self.transaction.reset()
+                self.register_type = None
+                self.data_unknown = True
+                self.device = self.no_address
+            return new_frame
 
-            elif self.register_type == DELTA_JUNC_TEMP:
-                self.decode_JUNC_TEMP(self.data_byte)
+        tr = self.transaction
 
-            elif self.register_type == ALERT1_HYSTERESIS:
-                self.decode_ALERT_HYSTERESIS(self.data_byte)
+        # start of a transaction, the frame will be an error frame unless we get data.
+        if not tr.active:
+            tr.active = True
+            tr.start_time = frame.start_time
+            tr.end_time = frame.end_time
 
-            elif self.register_type == ALERT2_HYSTERESIS:
-                self.decode_ALERT_HYSTERESIS(self.data_byte)
+            # bus metrics of a window that is complete, shown in the bus idle time before this transaction
+            if self.metrics is not None and frame.type == "start":
+                report = self.metrics_window(frame.start_time)
+                if report is not None:
+                    return report
 
-            elif self.register_type == ALERT3_HYSTERESIS:
-                self.decode_ALERT_HYSTERESIS(self.data_byte)
+        if frame.type == "error":
+            if self.fields_only:
+                tr.error = True
+            else:
+                tr.description.clear()
+                tr.description.append("error")
+                tr.has_description = True
 
-            elif self.register_type == ALERT4_HYSTERESIS:
-                self.decode_ALERT_HYSTERESIS(self.data_byte)
+        if frame.type == "address":
+            address_byte = frame.data["address"][0]
 
-            elif self.register_type == ALERT1_CONFIG:
-                self.decode_ALERT_CONFIG(self.data_byte)
+            if not self.accept[address_byte]:
+                self.skip = True
+                return None
 
-            elif self.register_type == ALERT2_CONFIG:
-                self.decode_ALERT_CONFIG(self.data_byte)
+            # switch to the decode state of this device
+            device = self.devices[address_byte]
+            if device is None:
+                device = self.devices[address_byte] = Device(address_byte)
+            self.device = device
 
-            elif self.register_type == ALERT3_CONFIG:
-                self.decode_ALERT_CONFIG(self.data_byte)
+            # responds to a read request of a register that is filtered out
+            if device.skip_responds:
+                device.skip_responds = False
+                if frame.data["read"]:
+                    self.skip = True
+                    return None
 
-            elif self.register_type == ALERT1_LIMIT:
-                self.decode_ALERT_LIMIT(self.data_byte)
+            tr.address = Hex_Byte[address_byte]
+            tr.read = frame.data["read"]
+            tr.ack = frame.data["ack"]     # true if ACK else NACK
 
-            elif self.register_type == ALERT2_LIMIT:
-                self.decode_ALERT_LIMIT(self.data_byte)
+        if frame.type == "data":
+            data_byte = frame.data["data"][0]
+            self.data_byte = data_byte
+            device = self.device
 
-            elif self.register_type == ALERT3_LIMIT:
-                self.decode_ALERT_LIMIT(self.data_byte)
+            # if waiting on responds from an assumed read request
+            if device.ObtainMode == True:
+                # restore the saved register to (potentially) decode the responds
+                self.register_type = device.request_register_type
 
-            elif self.register_type == ALERT4_LIMIT:
-                self.decode_ALERT_LIMIT(self.data_byte)
+            # no register known yet
+            if self.register_type is None:
+                self.register_type = data_byte
+
+                # register that is filtered out, skip the rest of the transaction (a write may be a read request)
+                if not self.registers[data_byte]:
+                    self.skip = True
+                    if tr.read != True:
+                        self.skip_request = data_byte
+
+            # select decoder for register from the dispatch table
+            # registers without decoder (either not created (yet) or not enough information
+            # to create decoder) are handled by add_databyte, supplying the raw data
+            else:
+                decoder, width = self.decoders[self.register_type]
 
-            elif self.register_type == ALERT4_CONFIG:
-                self.decode_ALERT_CONFIG(self.data_byte)
+                if width == 1:
+                    self.reg_value = data_byte
+                    decoder(data_byte)
 
-            elif self.register_type == THERMO_SENSOR_CONFIG:
-                self.decode_THERMO_SENSOR_CONFIG(self.data_byte)
+                else:
+                    # get the 16 / 24 bits
+                    if device.reg_count < width:
+                        device.reg_data = (device.reg_data << 8) | data_byte
+                        device.reg_count += 1
 
-            elif self.register_type == SENSOR_STATUS:
-                self.decode_SENSOR_STATUS(self.data_byte)
+                    if device.reg_count == width:
+                        self.reg_value = device.reg_data
+                        decoder(device.reg_data)
+                        device.reg_data = 0
+                        device.reg_count = 0
 
-            elif self.register_type == DEVICE_CONFIG:
-                self.decode_DEVICE_CONFIG(self.data_byte)
+        if frame.type == "stop":
+            tr.end_time = frame.end_time
+            self.last_stop = frame.end_time
+            device = self.device
 
-            elif self.register_type == DEVICE_ID:
-                self.decode_DEVICE_ID(self.data_byte)
+            if self.metrics is not None:
+                self.measure_transaction(device)
 
-            elif self.register_type == RAW_ADC:
-                self.decode_RAW_ADC(self.data_byte)
+            request = None
 
-            # oh oh no decoder available for this register
-            # either not created (yet) or not enough information to create decoder
-            # for now supplying the raw data
-            else:
-                self.add_databyte()
+            # if we had a read request before (single register) assume this is a responds on the read request
+            if device.ObtainMode == True:
+                device.ObtainMode = False
+
+                # responds without data bytes (NACK): the register is only restored with the first data byte
+                if self.register_type is None:
+                    self.register_type = device.request_register_type
+
+                # the read request frame of this responds was held
+                if self.pending_read is not None and self.pending_read[1] is device:
+                    request = self.pending_read[0]
+                    self.pending_read = None
+
+                # merge with the read request frame
+                if request is not None and self.merge_reads:
+                    tr.start_time = request.start_time
+                    if self.fields_only:
+                        new_frame = self.field_frame()
+                    else:
+                        tr.description.insert(0, "Read:, ")
+                        new_frame = tr.frame("readreg")
+                        new_frame.data["register"] = Register_Names.get(self.register_type, "unknown")
+                    request = None
+                elif self.fields_only:
+                    new_frame = self.field_frame()
+                else:
+                    tr.description.insert(0, "Responds:, ")
+                    new_frame = tr.frame()
 
-        if frame.type == "stop":
-            self.temp_frame.end_time = frame.end_time
+                # a temperature reading goes into the summary, a summary frame is always output
+                if self.summaries and self.register_type in Temperature_Registers and self.reg_value is not None:
+                    summary = self.summarize(new_frame, device)
 
-            # if we had a read request before (single register) assume this is a responds on the read request
-            if self.ObtainMode == True:
-                desc = self.temp_frame.data["description"]
-                self.temp_frame.data["description"] = ""
-                self.add_description("Responds:")
-                self.add_description(desc)
-                self.ObtainMode = False
+                    # instead of reads: the summary takes the place of the read, its read request is not shown
+                    if self.summary_only:
+                        new_frame = summary
+                        request = None
+                    else:
+                        if self.changes_only:
+                            new_frame = self.filter_change(new_frame, device)
+                        if summary is not None:
+                            new_frame = summary if new_frame is None else [new_frame, summary]
 
-                new_frame = self.temp_frame
+                elif self.changes_only:
+                    new_frame = self.filter_change(new_frame, device)
 
             # No data received in this frame
             elif self.data_unknown == True:
 
                 # if only the I2C-address was received.
-                if self.register_type == None:
+                if self.register_type is None:
 
                     # if only the address was received. assume a 'I2C-ping' to test the device is there
                     # only the first PING is acknowledged by the MCP9600
-                    if self.temp_frame.data["ack"] == True:
-                        new_frame = AnalyzerFrame("ping", self.temp_frame.start_time, frame.end_time, {
-                            "address": self.temp_frame.data["address"],
+                    if tr.ack == True:
+                        new_frame = AnalyzerFrame("ping", tr.start_time, frame.end_time, {
+                            "address": tr.address,
                         }
                     )
                     # the next I2c_address + write BIT AND the first I2C_address + read BIT after a PING gets a NACK
                     else:
                         # In case of a read and NO bytes.. that is an error
-                        if self.temp_frame.data["read"] == True:
-                            new_frame = AnalyzerFrame("ReadErr", self.temp_frame.start_time, frame.end_time, {
-                            "address": self.temp_frame.data["address"],
+                        if tr.read == True:
+                            new_frame = AnalyzerFrame("ReadErr", tr.start_time, frame.end_time, {
+                            "address": tr.address,
                             }
                         )
                         # An I2C address + write attempt that did not succesfull
                         else:
-                            new_frame = AnalyzerFrame("pingERR", self.temp_frame.start_time, frame.end_time, {
-                            "address": self.temp_frame.data["address"],
+                            new_frame = AnalyzerFrame("pingERR", tr.start_time, frame.end_time, {
+                            "address": tr.address,
                             }
                         )
                 # so we did get a byte and if only ONE byte assume this is a register read request
                 else:
-                    self.add_description("Obtain ")
-                    self.add_register(self.register_type)
-                    self.request_register_type = self.register_type
-                    self.ObtainMode = True
-
-                    new_frame = AnalyzerFrame("read", self.temp_frame.start_time, frame.end_time, {
-                        "address": self.temp_frame.data["address"],
-                        "description" : self.temp_frame.data["description"]
-                        }
-                )
-            # this is a "normal" write to a register
-            else:
-                new_frame = self.temp_frame
-                self.ObtainMode = False
-
-            # reset different variables
-            self.data_unknown = True
-            self.temp_frame = None
-            self.register_type = None
-
-            return new_frame
-
-    def add_databyte(self):
-        """ Just add data byte """
-        self.temp_frame.data["count"] += 1
-        if len(self.temp_frame.data["data"]) > 0:
-            self.temp_frame.data["data"] += ", "
-        self.temp_frame.data["data"] += hex(self.data_byte)
-        self.temp_frame.data["description"] += "data only"
-
-    def add_action(self,act):
-        """ add comma separated action """
-        if len(self.temp_frame.data["action"]) > 0:
-            self.temp_frame.data["action"] += ", "
-        self.temp_frame.data["action"] += act
-
-    def add_description(self,act):
-        """ add comma separated description """
-        if len(self.temp_frame.data["description"]) > 0:
-            self.temp_frame.data["description"] += ", "
-        self.temp_frame.data["description"] += act
-        self.data_unknown = False
-
-    def add_register(self,act):
-        """ Add a register to description """
-        if act in MCP9600_Registers:
-            reg = MCP9600_Registers[act]
-            self.add_description(reg)
-        else:
-            self.add_description("unknown")
-
-    def decode_JUNC_TEMP(self,data_byte):
-        """ HOT_JUNC_TEMP, DELTA_JUNC_TEMP, COLD_JUNC_TEMP """
-        # get the 16 bits
-        if self.reg_count < 2:
-            self.reg_data = self.reg_data << 8
-            self.reg_data = self.reg_data | data_byte
-            self.reg_count += 1
-
-        if self.reg_count == 2:
-
-            self.add_register(self.register_type)
-
-            # The Ambient register contains the thermocouple cold-junction temperature or the device ambient temperature
-            # data. Bits 1 and 0 may remain clear (‘0’) depending on the status of the Resolution setting, bit 7 of
-            # Device Config register. As such the resolution calculation stays the same  * 0.0625
-            Temp = self.reg_data * DEV_RESOLUTION
-
-            # if sign bit(s) is set, the temperature is negative
-            if self.reg_data & 0x80:
-                Temp = Temp - 4096
-
-            # set for 2 decimals
-            format_float = "{:.2f}".format(Temp)
-
-            self.add_description("Temp: ")
-            self.temp_frame.data["description"] += str(format_float)
-            self.temp_frame.data["description"] += "°C"
-
-            self.temp_frame.data["count"] += 2
-            self.temp_frame.data["data"] += hex(self.reg_data)
-
-            self.reg_data = 0
-            self.reg_count = 0
-
-    def decode_DEVICE_ID(self,data_byte):
-
-        # get the 16 bits
-        if self.reg_count < 2:
-            self.reg_data = self.reg_data << 8
-            self.reg_data = self.reg_data | data_byte
-            self.reg_count += 1
-
-        if self.reg_count == 2:
-            self.add_register(self.register_type)
-
-            dev = (self.reg_data >> 8)
-            self.temp_frame.data["description"] += hex(dev)
-
-            maj = (self.reg_data >> 4) & 0x0f
-            self.add_description("Maj: ")
-            self.temp_frame.data["description"] += hex(maj)
-
-            minn = self.reg_data & 0x0f
-            self.add_description("Min: ")
-            self.temp_frame.data["description"] += hex(minn)
-
-            self.temp_frame.data["count"] += 2
-            self.temp_frame.data["data"] += hex(self.reg_data)
-
-            self.reg_data = 0
-            self.reg_count = 0
-
-    def decode_ALERT_HYSTERESIS(self, data_byte):
-        """ ALERT1_HYSTERESIS, ALERT2_HYSTERESIS, ALERT3_HYSTERESIS """
-        self.add_register(self.register_type)
-
-        self.add_description("hysteresis: ")
-        self.temp_frame.data["description"] += str(data_byte)
-
-        self.temp_frame.data["count"] += 1
-        self.temp_frame.data["data"] += hex(data_byte)
-
-    def decode_ALERT_LIMIT(self,data_byte):
-        """ ALERT1_LIMIT, ALERT2_LIMIT, ALERT3_LIMIT """
-        # get the 16 bits
-        if self.reg_count < 2:
-            self.reg_data = self.reg_data << 8
-            self.reg_data = self.reg_data | data_byte
-            self.reg_count += 1
-
-        if self.reg_count == 2:
-
-            self.add_register(self.register_type)
-
-            f = float(self.reg_data >> 4)
-            if (self.reg_data & 0x8):
-                 f = f + 0.5
-            if (self.reg_data & 0x4):
-                 f = f + 0.25
-
-            self.add_description("Limit: ")
-            self.temp_frame.data["description"] += str(f)
-
-            self.temp_frame.data["count"] += 2
-            self.temp_frame.data["data"] += hex(self.reg_data)
-
-            self.reg_data = 0
-            self.reg_count = 0
+                    device.request_register_type = self.register_type
+                    device.ObtainMode = True
+
+                    if self.fields_only:
+                        new_frame = AnalyzerFrame("field_read", tr.start_time, frame.end_time, {
+                            "address": tr.address,
+                            "register": Register_Names.get(self.register_type, "unknown"),
+                            "pointer": self.register_type,
+                            }
+                    )
+                    else:
+                        self.add_description("Obtain ")
+                        self.add_register(self.register_type)
 
-    def decode_THERMO_SENSOR_CONFIG(self, data_byte):
+                        new_frame = AnalyzerFrame("read", tr.start_time, frame.end_time, {
+                            "address": tr.address,
+                            "description" : "".join(tr.description)
+                            }
+                    )
 
-        self.add_register(self.register_type)
+                    # hold the read request until the responds, output the one held before (if any)
+                    if self.hold_reads:
+                        pending = None if self.pending_read is None else self.release_read()
+                        self.pending_read = (new_frame, device)
+                        new_frame = pending
 
-        self.add_description("Type: ");
-        term = (data_byte >> 4) & 0x7
-        if term in Thermocouple_Type:
-            TermType = Thermocouple_Type[term]
-            self.temp_frame.data["description"] += TermType
-        else:
-            self.temp_frame.data["description"] += "unknown"
+            # this is a "normal" write to a register
+            else:
+                new_frame = self.field_frame() if self.fields_only else tr.frame()
+                device.ObtainMode = False
 
-        self.add_description("filter(")
-        Filter = data_byte & 0x3
-        self.temp_frame.data["description"] +=(str(Filter))
-        self.temp_frame.data["description"] += ")"
+                if self.changes_only:
+                    new_frame = self.filter_change(new_frame, device)
 
-        if Filter == 0:
-            self.temp_frame.data["description"] += " Off"
+            # output the read request with its responds, or drop both if the responds is not output
+            if request is not None and new_frame is not None:
+                new_frame = [request] + new_frame if type(new_frame) is list else [request, new_frame]
 
-        elif Filter == 2:
-            self.temp_frame.data["description"] += " Minimum"
+            # any other frame: the read request that is held can not be merged any more, output it first
+            elif self.pending_read is not None and new_frame is not None and \
+                 (type(new_frame) is list or new_frame.type not in ("read", "readreg", "field_read")):
+                request = self.release_read()
+                if request is not None:
+                    new_frame = [request] + new_frame if type(new_frame) is list else [request, new_frame]
 
-        elif Filter == 4:
-            self.temp_frame.data["description"] += " Mid"
+            # reset different variables
+            tr.reset()
+            self.data_unknown = True
+            self.register_type = None
+            self.reg_value = None
+            self.device = self.no_address
 
-        elif Filter == 7:
-            self.temp_frame.data["description"] += " Max"
+            return new_frame
 
-        self.temp_frame.data["count"] += 1
-        self.temp_frame.data["data"] += hex(data_byte)
+    def decode_many(self, frames):
+        '''
+        generator: decode a sequence of input frames, yield the frames created (lists are flattened).
 
-    def decode_RAW_ADC(self, data_byte):
+        Same state machine as decode() and the same output as calling decode() frame by frame.
+        The start, address and data frames of a transaction are handled in this loop with the
+        attributes in locals, the other frames (and transactions that are skipped) go to decode().
+        '''
+        decode = self.decode
+
+        # instrumentation counts and times every frame in decode()
+        if self.stats is not None:
+            for frame in frames:
+                out = decode(frame)
+                if out is not None:
+                    if type(out) is list:
+                        yield from out
+                    else:
+                        yield out
+            return
+
+        tr = self.transaction
+        decoders = self.decoders
+        devices = self.devices
+        accept = self.accept
+        registers = self.registers
+        metrics = self.metrics is not None
+        skip = self.skip
+        device = self.device
+
+        for frame in frames:
+            frame_type = frame.type
+
+            if skip or not tr.active:
+                if frame_type == "start" and not skip and not metrics:
+                    tr.active = True
+                    tr.start_time = frame.start_time
+                    tr.end_time = frame.end_time
+                    continue
+
+            elif frame_type == "data":
+                data_byte = frame.data["data"][0]
+                self.data_byte = data_byte
+
+                # same as in decode()
+                if device.ObtainMode == True:
+                    self.register_type = device.request_register_type
+
+                register_type = self.register_type
+                if register_type is None:
+                    self.register_type = data_byte
+
+                    if not registers[data_byte]:
+                        self.skip = skip = True
+                        if tr.read != True:
+                            self.skip_request = data_byte
+                else:
+                    decoder, width = decoders[register_type]
 
-        # get the 24 bits
-        if self.reg_count < 3:
-            self.reg_data = self.reg_data << 8
-            self.reg_data = self.reg_data | data_byte
-            self.reg_count += 1
+                    if width == 1:
+                        self.reg_value = data_byte
+                        decoder(data_byte)
 
-        if self.reg_count == 3:
+                    else:
+                        if device.reg_count < width:
+                            device.reg_data = (device.reg_data << 8) | data_byte
+                            device.reg_count += 1
+
+                        if device.reg_count == width:
+                            self.reg_value = device.reg_data
+                            decoder(device.reg_data)
+                            device.reg_data = 0
+                            device.reg_count = 0
+                continue
+
+            elif frame_type == "address":
+                address_byte = frame.data["address"][0]
+
+                if not accept[address_byte]:
+                    self.skip = skip = True
+                    continue
+
+                device = devices[address_byte]
+                if device is None:
+                    device = devices[address_byte] = Device(address_byte)
+                self.device = device
+
+                if device.skip_responds:
+                    device.skip_responds = False
+                    if frame.data["read"]:
+                        self.skip = skip = True
+                        continue
+
+                tr.address = Hex_Byte[address_byte]
+                tr.read = frame.data["read"]
+                tr.ack = frame.data["ack"]
+                continue
+
+            out = decode(frame)
+            skip = self.skip
+            device = self.device
+
+            if out is not None:
+                if type(out) is list:
+                    yield from out
+                else:
+                    yield out
 
-            self.add_register(self.register_type)
+    def decode_arrays(self, types, data, start_times, end_times):
+        '''
+        generator: decode_many() on parallel sequences of frame type, data dict, start and end time.
 
-            self.temp_frame.data["description"] += "Raw: "
-            self.temp_frame.data["description"] +=str(self.reg_data)
+        One input frame is reused for all the entries, the analyzer does not keep a reference to it.
+        '''
+        frame = AnalyzerFrame("", None, None)
 
-            self.temp_frame.data["count"] += 3
-            self.temp_frame.data["data"] += hex(self.reg_data)
+        def frames():
+            for frame.type, frame.data, frame.start_time, frame.end_time in zip(types, data, start_times, end_times):
+                yield frame
 
-            self.reg_data = 0
-            self.reg_count = 0
+        return self.decode_many(frames())
 
-    def decode_DEVICE_CONFIG(self, data_byte):
+    def release_read(self):
+        '''
+        The held read request can not be paired with its responds any more (another transaction came
+        in between): returns its frame to output, None when a read request is only shown with its responds.
+        '''
+        frame = self.pending_read[0]
+        self.pending_read = None
+        return frame if self.unpaired_reads else None
 
-        self.add_register(self.register_type)
+    def summarize(self, frame, device):
+        '''
+        Temperature summary: add the reading of the responds frame to the statistics of the register.
+        When the window is complete (N reads / T seconds) a summary frame is returned, else None. Next to
+        the read it starts where the read ends, instead of the read it takes the time of the read.
+        '''
+        summary = device.summaries.get(self.register_type)
+        if summary is None:
+            summary = device.summaries[self.register_type] = Summary()
 
-        self.add_action("Cold Res: ")
+        summary.add(frame.start_time, junc_temp(self.reg_value))
 
-        # ambient / cold resolution
-        if data_byte & 0x80:
-            self.temp_frame.data["action"] += "0.25"
-        else:
-            self.temp_frame.data["action"] += "0.0625"
+        if (self.summary_count > 0 and summary.count >= self.summary_count) or \
+           (self.summary_time > 0 and float(frame.end_time - summary.start) >= self.summary_time):
 
-        self.add_action("Hot Res: ")
-        res = (data_byte >> 5) & 0x3
-        if res in Thermocouple_Resolution:
-            self.temp_frame.data["action"] += Thermocouple_Resolution[res]
-        else:
-            self.temp_frame.data["action"] += "unknown"
+            start = frame.start_time if self.summary_only else frame.end_time
+            new_frame = AnalyzerFrame("summary", start, frame.end_time, {
+                "address": frame.data["address"],
+                "register": Register_Names.get(self.register_type, "unknown"),
+                }
+            )
+            new_frame.data.update(summary.frame_data(frame.end_time))
+            summary.reset()
+            return new_frame
 
-        samples = (data_byte >> 2) & 0x3
-        if samples in Burst_Sample:
-            self.add_action(Burst_Sample[samples])
-        else:
-            self.add_action("Samples?")
+        return None
 
-        self.add_action("Shutdown: ")
-        shut = data_byte & 0x3
-        if shut in shutdown_modes:
-            self.temp_frame.data["action"] += shutdown_modes[shut]
+    def measure_transaction(self, device):
+        '''
+        Bus metrics: add the transaction that ends with this stop. Per address the metrics_devices list
+        [time temperature ready, read request register, read request start, register -> last value read]
+        '''
+        tr = self.transaction
+        metrics = self.metrics
+
+        if metrics.start is None:
+            metrics.start = tr.start_time
+        metrics.end = tr.end_time
+        metrics.busy += float(tr.end_time - tr.start_time)
+        metrics.transactions += 1
+
+        register = self.register_type
+        if register is None or device.address is None:
+            return
+
+        state = self.metrics_devices.get(device.address)
+        if state is None:
+            state = self.metrics_devices[device.address] = [None, None, None, {}]
+
+        # read request (register pointer only)
+        if device.ObtainMode == False:
+            if self.data_unknown == True:
+                state[1] = register
+                state[2] = tr.start_time
+            return
+
+        # responds on a read request
+        value = self.reg_value
+        if value is None:
+            return
+
+        metrics.reads += 1
+        metrics.register_reads[register] = metrics.register_reads.get(register, 0) + 1
+
+        if state[3].get(register) == value:
+            metrics.unchanged += 1
         else:
-            self.temp_frame.data["action"] += "unknown"
-
-        self.temp_frame.data["count"] += 1
-        self.temp_frame.data["data"] += hex(data_byte)
-
+            state[3][register] = value
+
+        # time from the first SENSOR_STATUS that reports a new temperature to the read of HOT_JUNC_TEMP
+        if register == SENSOR_STATUS:
+            if value & STATUS_READY and state[0] is None:
+                state[0] = tr.end_time
+
+        elif register == HOT_JUNC_TEMP and state[0] is not None:
+            start = state[2] if state[1] == register else tr.start_time
+            latency = float(start - state[0])
+            if latency < 0:
+                latency = float(tr.start_time - state[0])
+
+            metrics.latency_count += 1
+            metrics.latency_sum += latency
+            metrics.latency_max = max(metrics.latency_max, latency)
+            state[0] = None
+
+    def metrics_window(self, time):
+        ''' Bus metrics: frame of the window when it is complete at time (start of a transaction), else None '''
+        metrics = self.metrics
+
+        # not while a read request is held, that frame would be output after the metrics
+        if metrics.start is None or self.pending_read is not None or float(time - metrics.start) < self.metrics_time:
+            return None
+
+        frame = AnalyzerFrame("metrics", self.last_stop, time, metrics.frame_data(time))
+        self.metrics_total.add(metrics)
+        metrics.reset()
+        return frame
+
+    def instrument(self):
+        '''
+        Decode instrumentation: count and time every decode() call and register decoder call in self.stats
+        (window of the stats frame) and self.stats_total. Without it the hot path is not changed at all.
+        '''
+        if self.stats is not None:
+            return
 
-    def decode_ALERT_CONFIG(self,data_byte):
-        ''' ALERT1_CONFIG, ALERT2_CONFIG, ALERT3_CONFIG '''
-        self.add_register(self.register_type)
+        self.stats = Stats()
+        self.stats_total = Stats()
 
-        if (data_byte & 0x01):
-            self.add_action("Alert enabled")
-        else:
-            self.add_action("Alert disabled")
+        for register in range(256):
+            decoder, width = self.decoders[register]
+            self.decoders[register] = (functools.partial(self.timed_decoder, decoder, register), width)
 
-        if (data_byte & 0x02):
-            self.add_action("Interrupt_mode:")
-        else:
-            self.add_action("Comparator_mode")
+        # the instance attribute is used instead of the method
+        self.decode = self.timed_decode
 
-        if (data_byte & 0x04):
-            self.add_action("Active_high")
-        else:
-            self.add_action("Active_low")
+    def timed_decode(self, frame):
+        ''' Instrumentation: decode() and add the frame, its time and the transaction to the stats '''
+        stats = self.stats
+        register = self.register_type
+        new = not self.transaction.active
 
-        if (data_byte & 0x8):
-            self.add_action("Alert on falling")
-        else:
-            self.add_action("Alert on rising")
+        start = perf_counter_ns()
+        out = Hla.decode(self, frame)
+        ns = perf_counter_ns() - start
 
-        if (data_byte & 0x10):
-            self.add_action("Monitor: T_C cold-junction")
-        else:
-            self.add_action("Monitor: T_H thermocouple")
+        # stats window that is complete, in the bus idle time before this transaction (after the bus metrics)
+        report = None
+        if new and frame.type == "start" and out is None and self.stats_time > 0:
+            report = self.stats_window(frame.start_time)
 
-        if (data_byte & 0x80):
-            self.add_action("Clears interrupt")
-        else:
-            self.add_action("Cleared interrupt")
+        if stats.start is None:
+            stats.start = frame.start_time
 
-        self.temp_frame.data["count"] += 1
-        self.temp_frame.data["data"] += hex(data_byte)
+        histogram = stats.frames.get(frame.type)
+        if histogram is None:
+            histogram = stats.frames[frame.type] = Histogram()
+        histogram.add(ns)
 
-    def decode_SENSOR_STATUS(self,data_byte):
+        if frame.type == "stop":
+            stats.end = frame.end_time
+            stats.transactions[register] = stats.transactions.get(register, 0) + 1
+
+        return out if report is None else report
+
+    def timed_decoder(self, decoder, register, reg_data):
+        ''' Instrumentation: call and time a register decoder '''
+        start = perf_counter_ns()
+        decoder(reg_data)
+        ns = perf_counter_ns() - start
+
+        histogram = self.stats.decoders.get(register)
+        if histogram is None:
+            histogram = self.stats.decoders[register] = Histogram()
+        histogram.add(ns)
+
+    def stats_window(self, time):
+        ''' Instrumentation: stats frame of the window when it is complete at time (start of a transaction), else None '''
+        stats = self.stats
+
+        if stats.end is None or self.pending_read is not None or float(time - stats.start) < self.stats_time:
+            return None
+
+        frame = AnalyzerFrame("stats", self.last_stop, time, stats.frame_data(time))
+        self.stats_total.add(stats)
+        stats.reset()
+        return frame
+
+    def stats_report(self):
+        ''' Instrumentation: Stats.report() of the whole run (None when not instrumented) '''
+        if self.stats is None:
+            return None
+
+        total = Stats()
+        total.add(self.stats_total)
+        total.add(self.stats)
+        report = total.report()
+        report["value_caches"] = cache_stats()
+        return report
+
+    def register_setting(self, value):
+        ''' registers of a StringSetting with register names (or numbers) separated by commas / spaces '''
+        registers = []
+        if not isinstance(value, str):
+            return registers
+
+        for name in value.replace(",", " ").split():
+            register = Register_Numbers.get(name.upper().rstrip(":"))
+            if register is None:
+                try:
+                    register = int(name, 0) & 0xff
+                except ValueError:
+                    raise ValueError("unknown register: " + name)
+            registers.append(register)
+        return registers
+
+    def number_setting(self, value):
+        ''' value of a NumberSetting as float, 0 when not set '''
+        return float(value) if isinstance(value, (int, float)) else 0.0
+
+    def filter_change(self, frame, device):
+        '''
+        Changes only: returns None if the register has the same value as the previous access that was output
+        (within the deadband for temperatures), else the frame. A changed value after repeats gets the
+        previous value, the number of repeats and their time span.
+        '''
+        register = self.register_type
+        data = frame.data.get("data")
+
+        temp = None
+        if register in Temperature_Registers and self.reg_value is not None:
+            temp = junc_temp(self.reg_value)
+
+        last = device.changes.get(register)
+
+        if last is not None:
+            if data == last[0] or (temp is not None and last[1] is not None and abs(temp - last[1]) <= self.deadband_temp):
+                if last[2] == 0:
+                    last[3] = frame.start_time
+                last[2] += 1
+                last[4] = frame.end_time
+                return None
+
+            if last[2] > 0:
+                frame.type = "field_change" if self.fields_only else "change"
+                if last[0] is not None:
+                    frame.data["previous"] = last[0]
+                frame.data["repeats"] = last[2]
+                frame.data["span"] = float(last[4] - last[3])
+
+        device.changes[register] = [data, temp, 0, None, None]
+        return frame
+
+    def flush(self):
+        ''' End of the capture (offline decoding): return the frames that are still held back '''
+        frames = []
+        if self.pending_read is not None:
+            request = self.release_read()
+            if request is not None:
+                frames.append(request)
+
+        # changes only: registers that kept their value until the end
+        for device in [self.no_address] + self.devices:
+            if device is None:
+                continue
+            for register, last in sorted(device.changes.items(), key = register_order):
+                if last[2] > 0:
+                    repeat = AnalyzerFrame("repeat", last[3], last[4], {
+                        "address": hex(device.address) if device.address is not None else "error",
+                        "register": Register_Names.get(register, "unknown"),
+                        "data": last[0],
+                        "repeats": last[2],
+                        "span": float(last[4] - last[3]),
+                        }
+                    )
+                    # raw fields: a responds without data bytes has no data
+                    if last[0] is None:
+                        del repeat.data["data"]
+                    frames.append(repeat)
+            device.changes = {}
+
+        # bus metrics: the last window and the report of the whole capture
+        if self.metrics is not None:
+            metrics = self.metrics
+            if metrics.start is not None:
+                frames.append(AnalyzerFrame("metrics", self.last_stop, self.last_stop, metrics.frame_data(self.last_stop)))
+                self.metrics_total.add(metrics)
+                metrics.reset()
+
+            total = self.metrics_total
+            if total.start is not None:
+                frames.append(AnalyzerFrame("metrics_report", total.start, total.end, total.frame_data(total.end)))
+                total.reset()
+
+        # decode stats: the last window
+        if self.stats is not None and self.stats_time > 0:
+            stats = self.stats
+            if stats.end is not None:
+                frames.append(AnalyzerFrame("stats", self.last_stop, self.last_stop, stats.frame_data(self.last_stop)))
+                self.stats_total.add(stats)
+                stats.reset()
+
+        return frames
+
+    def get_state(self):
+        '''
+        State carried from one I2C transaction to the next, only complete right after a stop.
+        Tuple of (address, device state) for the devices not in reset state, address None is
+        the state for transactions without address. A held read request frame is added as
+        ('read', address, start_time, end_time, data), the bus metrics as ('metrics', window, total, devices, last stop).
+        '''
+        state = []
+        for device in [self.no_address] + self.devices:
+            if device is not None:
+                device_state = device.get_state()
+                if device_state != DEVICE_RESET_STATE:
+                    state.append((device.address, device_state))
+
+        if self.pending_read is not None:
+            frame, device = self.pending_read
+            state.append(('read', device.address, frame.start_time, frame.end_time, tuple(frame.data.items())))
+
+        if self.metrics is not None:
+            devices = tuple((address, (ready, register, start, tuple(sorted(last.items()))))
+                            for address, (ready, register, start, last) in sorted(self.metrics_devices.items()))
+            state.append(('metrics', self.metrics.get_state(), self.metrics_total.get_state(), devices, self.last_stop))
+
+        return tuple(state)
+
+    def set_state(self, state):
+        ''' Continue decoding from a state returned by get_state '''
+        self.devices = [None] * 256
+        self.no_address = Device()
+        self.device = self.no_address
+        self.pending_read = None
+
+        for item in state:
+            if item[0] == 'read':
+                _, address, start_time, end_time, data = item
+                frame = AnalyzerFrame("field_read" if self.fields_only else "read", start_time, end_time, dict(data))
+                self.pending_read = (frame, self.get_device(address))
+            elif item[0] == 'metrics':
+                _, window, total, devices, self.last_stop = item
+                self.metrics.set_state(window)
+                self.metrics_total.set_state(total)
+                self.metrics_devices = {address: [ready, register, start, dict(last)]
+                                        for address, (ready, register, start, last) in devices}
+            else:
+                address, device_state = item
+                self.get_device(address).set_state(device_state)
+
+    def get_device(self, address):
+        ''' Device for an address, created if needed '''
+        if address is None:
+            return self.no_address
+        if self.devices[address] is None:
+            self.devices[address] = Device(address)
+        return self.devices[address]
+
+    def add_databyte(self, data_byte):
+        """ Just add data byte """
+        tr = self.transaction
+        tr.count += 1
+        if tr.has_data:
+            tr.data.append(", ")
+        tr.data.append(Hex_Byte[data_byte])
+        tr.has_data = True
+        tr.description.append("data only")
+        tr.has_description = True
 
-        self.add_register(self.register_type)
+    def add_action(self,act):
+        """ add comma separated action """
+        tr = self.transaction
+        if tr.has_action:
+            tr.action.append(", ")
+        tr.action.append(act)
+        if act:
+            tr.has_action = True
 
-        if (data_byte & 0x01):
-            self.add_action("TX > AL1")
-        else:
-            self.add_action("TX < AL1")
+    def add_description(self,act):
+        """ add comma separated description """
+        tr = self.transaction
+        if tr.has_description:
+            tr.description.append(", ")
+        tr.description.append(act)
+        if act:
+            tr.has_description = True
+        self.data_unknown = False
 
-        if (data_byte & 0x02):
-            self.add_action("TX > AL2")
-        else:
-            self.add_action("TX < AL2")
+    def add_text(self, text):
+        """ add text to the description (no separator) """
+        tr = self.transaction
+        tr.description.append(text)
+        if text:
+            tr.has_description = True
 
-        if (data_byte & 0x04):
-            self.add_action("TX > AL3")
-        else:
-            self.add_action("TX < AL3")
+    def add_data(self, data, count):
+        """ add the data text of a decoded register and the number of bytes """
+        tr = self.transaction
+        tr.data.append(data)
+        tr.has_data = True
+        tr.count += count
 
-        if (data_byte & 0x8):
-            self.add_action("TX > AL4")
-        else:
-            self.add_action("TX < AL4")
+    def add_register(self,act):
+        """ Add a register to description """
+        self.add_description(MCP9600_Registers.get(act, "unknown"))
 
-        if (data_byte & 0x10):
-            self.add_action("EMF error")
+    def shadow_value(self, decoder, width, reg_data):
+        '''
+        Decode a configuration register and keep the value in the register shadow of the device.
+        A read that returns another value than the shadow is flagged (first value of the read only).
+        The ADC resolution is only derived again when DEVICE_CONFIG changed.
+        '''
+        decoder(reg_data)
+
+        device = self.device
+        register = self.register_type
+        shadow = device.shadow.get(register)
+
+        if shadow == reg_data:
+            return
+
+        tr = self.transaction
+        if shadow is not None and tr.read == True and tr.count == width:
+            tr.expected = shadow
+            if not self.fields_only:
+                self.add_action("Differs from shadow: " + hex(shadow))
+
+        device.shadow[register] = reg_data
+
+        if register == DEVICE_CONFIG:
+            device.adc_bits = ADC_Resolution[(reg_data >> 5) & 0x3]
+
+    def identify(self, decoder, reg_data):
+        ''' DEVICE_ID: registers of the device are decoded with the register map of its DEVICE_ID from now on '''
+        decoder(reg_data)
+
+        chip = reg_data >> 8
+        if chip in Register_Maps:
+            self.device.chip = chip
+
+    def field_frame(self):
+        ''' Frame text : raw fields, output frame of the transaction '''
+        tr = self.transaction
+        data = {
+            "address": tr.address,
+            "register": Register_Names.get(self.register_type, "unknown"),
+            "count": tr.count,
+        }
+        # no None values in the frame data, a responds without data bytes has no data
+        if self.register_type is not None:
+            data["pointer"] = self.register_type
+        if tr.value is not None:
+            data["data"] = tr.value
+        if tr.read is not None:
+            data["read"] = tr.read
+            data["ack"] = tr.ack
+
+        if tr.error:
+            type = "field_error"
+        elif tr.temp is not None:
+            type = "field_temp"
+            data["temp"] = tr.temp
         else:
-            self.add_action("EMF OK")
+            type = "field"
+
+        if tr.adc is not None:
+            data["uv"] = tr.adc
+            data["resolution"] = tr.adc_bits
+        if tr.expected is not None:
+            data["expected"] = tr.expected
+        if self.device.chip not in (None, MCP9600_ID):
+            data["chip"] = self.device.chip
+
+        return AnalyzerFrame(type, tr.start_time, tr.end_time, data)
+
+    # raw fields: the values of a transaction are collected in one value (as the data text of decoded text)
+
+    def field_byte(self, data_byte):
+        """ raw fields: data byte of a register without decoder """
+        tr = self.transaction
+        tr.value = data_byte if tr.value is None else (tr.value << 8) | data_byte
+        tr.count += 1
+
+    def field_value(self, width, reg_data):
+        """ raw fields: register value """
+        tr = self.transaction
+        tr.value = reg_data if tr.value is None else (tr.value << (8 * width)) | reg_data
+        tr.count += width
+        self.data_unknown = False
 
-        if (data_byte & 0x20):
-            self.add_action("Thermocouple Shorted")
+    def field_temp(self, width, reg_data):
+        """ raw fields: HOT_JUNC_TEMP, DELTA_JUNC_TEMP, COLD_JUNC_TEMP value and temperature """
+        tr = self.transaction
+        tr.value = reg_data if tr.value is None else (tr.value << (8 * width)) | reg_data
+        tr.temp = junc_temp(reg_data)
+        tr.count += width
+        self.data_unknown = False
 
-        if (data_byte & 0x40):
-            self.add_action("conversion complete")
+    def field_adc(self, width, reg_data):
+        """ raw fields: RAW_ADC value and µV, when the ADC resolution is known """
+        tr = self.transaction
+        tr.value = reg_data if tr.value is None else (tr.value << (8 * width)) | reg_data
+        tr.count += width
+        self.data_unknown = False
 
-        if (data_byte & 0x80):
-            self.add_action("Burst complete")
+        bits = self.device.adc_bits
+        if bits is not None:
+            tr.adc = raw_adc(reg_data, bits)
+            tr.adc_bits = bits
+
+    def field_limit(self, width, reg_data):
+        """ raw fields: ALERT1_LIMIT, ALERT2_LIMIT, ALERT3_LIMIT value and temperature """
+        tr = self.transaction
+        tr.value = reg_data if tr.value is None else (tr.value << (8 * width)) | reg_data
+        tr.temp = alert_limit(reg_data)
+        tr.count += width
+        self.data_unknown = False
 
-        self.temp_frame.data["count"] += 1
-        self.temp_frame.data["data"] += hex(data_byte)
+    def describe(self, frame):
+        '''
+        Text of a raw fields frame as (description, action), the same as decoded text would show.
+        Made on demand, e.g. only for the frames that are looked at.
+        '''
+        register = frame.data.get("pointer")
+        value = frame.data.get("data")
+        if register is None or value is None:
+            return "", ""
+
+        saved = self.transaction, self.register_type, self.data_unknown, self.device
+        tr = self.transaction = Transaction()
+        self.register_type = register
+
+        # decode with the ADC resolution and register map of the frame, the shadow is not used
+        self.device = Device()
+        self.device.adc_bits = frame.data.get("resolution")
+        self.device.chip = frame.data.get("chip")
+
+        # decode each register value that was collected
+        decoder, width = self.text_decoders[register]
+        mask = (1 << (8 * width)) - 1
+        first = True
+        for shift in range(8 * (frame.data.get("count", width) - width), -1, -8 * width):
+            decoder((value >> shift) & mask)
+
+            if first and "expected" in frame.data:
+                self.add_action("Differs from shadow: " + hex(frame.data["expected"]))
+            first = False
+
+        text = "".join(tr.description), "".join(tr.action)
+
+        self.transaction, self.register_type, self.data_unknown, self.device = saved
+        return text
@@ -0,0 +1,122 @@
+'''
+Synthetic I2C frame streams, as the Saleae I2C analyzer would pass them to the Hla.
+
+Times are in seconds, every byte on the bus (address or data) takes 9 bit times.
+'''
+import random
+
+import mcp9600_offline             # installs the saleae stand-in when needed
+from saleae.analyzers import AnalyzerFrame
+
+import HighLevelAnalyzer
+from HighLevelAnalyzer import MCP9600_Registers, REGISTER_DECODERS
+
+MCP9600_ADDRESS = 0x60
+
+class FrameGen:
+    ''' build I2C transactions as lists of input frames '''
+
+    def __init__(self, bus_speed = 100000, seed = 1):
+        self.time = 0.0
+        self.bit = 1.0 / bus_speed
+        self.random = random.Random(seed)
+        self.frames = []
+
+    def frame(self, type, bits, data = None):
+        start = self.time
+        self.time += bits * self.bit
+        self.frames.append(AnalyzerFrame(type, start, self.time, {} if data is None else data))
+
+    def transaction(self, address, read, data = (), ack = True, error = False):
+        ''' start, address, data bytes, (error), stop '''
+        self.frame("start", 1)
+        self.frame("address", 9, {"address": bytes((address,)), "read": read, "ack": ack})
+        for byte in data:
+            self.frame("data", 9, {"data": bytes((byte,)), "ack": True})
+        if error:
+            self.frame("error", 1)
+        self.frame("stop", 1)
+        self.time += 10 * self.bit            # bus idle between transactions
+
+    def read_register(self, address, register, width):
+        ''' pointer write followed by a read of width bytes '''
+        self.transaction(address, False, (register,))
+        self.transaction(address, True, [self.random.randrange(256) for _ in range(width)])
+
+    def write_register(self, address, register, width):
+        self.transaction(address, False, [register] + [self.random.randrange(256) for _ in range(width)])
+
+def width(register):
+    return REGISTER_DECODERS.get(register, (None, 1))[1]
+
+def poll(register, count, devices = (MCP9600_ADDRESS,), stable = False):
+    ''' firmware polling loop on one register, stable : the value does not change '''
+    gen = FrameGen()
+    for _ in range(count):
+        for address in devices:
+            if stable:
+                gen.transaction(address, False, (register,))
+                gen.transaction(address, True, (0x01, 0x90)[:width(register)] if width(register) < 3 else (0x01, 0x90, 0x00))
+            else:
+                gen.read_register(address, register, width(register))
+    return gen.frames
+
+def all_registers(count):
+    ''' 1/2/3-byte reads of every known register, writes to the writable ones '''
+    gen = FrameGen()
+    registers = sorted(MCP9600_Registers)
+    for i in range(count):
+        register = registers[i % len(registers)]
+        gen.read_register(MCP9600_ADDRESS, register, width(register))
+        if width(register) == 1:
+            gen.write_register(MCP9600_ADDRESS, register, 1)
+    return gen.frames
+
+def ping_nack(count):
+    ''' I2C-pings, write NACKs and read errors '''
+    gen = FrameGen()
+    for _ in range(count):
+        gen.transaction(MCP9600_ADDRESS, False)
+        gen.transaction(MCP9600_ADDRESS, False, ack = False)
+        gen.transaction(MCP9600_ADDRESS, True, ack = False)
+    return gen.frames
+
+def errors(count):
+    ''' reads with bus errors and partial multi-byte reads '''
+    gen = FrameGen()
+    for i in range(count):
+        gen.transaction(MCP9600_ADDRESS, False, (HighLevelAnalyzer.HOT_JUNC_TEMP,))
+        gen.transaction(MCP9600_ADDRESS, True, (0x01,) if i % 2 else (0x01, 0x90), error = i % 3 == 0)
+    return gen.frames
+
+def multi_device(count):
+    ''' 8 MCP9600 on one bus, interleaved pointer writes and reads, plus other I2C traffic '''
+    gen = FrameGen()
+    devices = range(0x60, 0x68)
+    for _ in range(count):
+        for address in devices:
+            gen.transaction(address, False, (HighLevelAnalyzer.HOT_JUNC_TEMP,))
+        for address in devices:
+            gen.transaction(address, True, (gen.random.randrange(256), gen.random.randrange(256)))
+        gen.transaction(0x20, False, (0x01, 0x02))
+    return gen.frames
+
+# name -> (frames, Hla settings)
+def scenarios(scale = 1):
+    n = 20000 * scale
+    return {
+        "poll_hot_junc":        (lambda: poll(HighLevelAnalyzer.HOT_JUNC_TEMP, n), {}),
+        "poll_sensor_status":   (lambda: poll(HighLevelAnalyzer.SENSOR_STATUS, n), {}),
+        "poll_raw_adc":         (lambda: poll(HighLevelAnalyzer.RAW_ADC, n), {}),
+        "all_registers":        (lambda: all_registers(n), {}),
+        "ping_nack":            (lambda: ping_nack(n), {}),
+        "errors":               (lambda: errors(n), {}),
+        "multi_device":         (lambda: multi_device(n // 8), {}),
+        "multi_device_filter":  (lambda: multi_device(n // 8), {"address_filter": "0x60"}),
+        "poll_merged":          (lambda: poll(HighLevelAnalyzer.HOT_JUNC_TEMP, n), {"read_frames": HighLevelAnalyzer.READ_MERGED}),
+        "poll_changes_only":    (lambda: poll(HighLevelAnalyzer.HOT_JUNC_TEMP, n, stable = True), {"emit_frames": HighLevelAnalyzer.EMIT_CHANGES}),
+        "poll_summary":         (lambda: poll(HighLevelAnalyzer.HOT_JUNC_TEMP, n), {"summary": HighLevelAnalyzer.SUMMARY_INSTEAD, "summary_reads": 100}),
+        "poll_fields":          (lambda: poll(HighLevelAnalyzer.HOT_JUNC_TEMP, n), {"frame_text": HighLevelAnalyzer.TEXT_FIELDS}),
+        "all_registers_fields": (lambda: all_registers(n), {"frame_text": HighLevelAnalyzer.TEXT_FIELDS}),
+        "multi_device_metrics": (lambda: multi_device(n // 8), {"metrics_interval": 0.1}),
+    }
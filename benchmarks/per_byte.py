@@ -0,0 +1,95 @@
+'''
+Decode time per data byte of two versions of HighLevelAnalyzer.py, on a firmware polling loop
+(pointer write + 2-byte read of HOT_JUNC_TEMP or DEVICE_ID), as measured for the register dispatch table.
+
+    python -m benchmarks.per_byte                                   1.0.1 (tests/reference_hla.py) and HighLevelAnalyzer.py
+    git show <commit>:HighLevelAnalyzer.py > /tmp/old.py            any version of the series
+    python -m benchmarks.per_byte /tmp/old.py HighLevelAnalyzer.py
+
+Every version decodes the frames one by one with decode(), as Logic 2 does. Per data byte (register pointer
+and value bytes) the best of --repeat runs is shown, of all frames and of the decode() calls of the data frames
+only. The register dispatch mostly changes the second: the old elif chain was short for HOT_JUNC_TEMP (the
+first branch) and long for DEVICE_ID.
+'''
+import argparse
+import importlib.util
+import os
+import sys
+from time import perf_counter_ns
+
+import mcp9600_offline             # installs the saleae stand-in when needed
+from saleae.analyzers import StringSetting, NumberSetting, ChoicesSetting
+
+from HighLevelAnalyzer import HOT_JUNC_TEMP, DEVICE_ID
+from . import framegen
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OLD = os.path.join(ROOT, "tests", "reference_hla.py")
+NEW = os.path.join(ROOT, "HighLevelAnalyzer.py")
+
+REGISTERS = (("HOT_JUNC_TEMP", HOT_JUNC_TEMP), ("DEVICE_ID", DEVICE_ID))
+
+def load(path, name):
+    ''' Hla class of a HighLevelAnalyzer.py file '''
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Hla
+
+def analyzer(cls):
+    ''' Hla with the default settings, versions with settings get them before __init__ (as in new_analyzer) '''
+    hla = cls.__new__(cls)
+    for name in dir(cls):
+        setting = getattr(cls, name)
+        if isinstance(setting, (StringSetting, NumberSetting, ChoicesSetting)):
+            setattr(hla, name, setting.default)
+    hla.__init__()
+    return hla
+
+def run(cls, frames):
+    ''' ns to decode the frames with a new analyzer: (all frames, the decode() calls of the data frames) '''
+    decode = analyzer(cls).decode
+    data = 0
+    start = perf_counter_ns()
+    for frame in frames:
+        if frame.type == "data":
+            begin = perf_counter_ns()
+            decode(frame)
+            data += perf_counter_ns() - begin
+        else:
+            decode(frame)
+    return perf_counter_ns() - start, data
+
+def per_byte(classes, frames, repeat):
+    '''
+    best ns per data byte of each class, as (all frames, data frames only). The runs of the classes
+    alternate, so they see the same load on the machine.
+    '''
+    count = sum(1 for frame in frames if frame.type == "data")
+    best = [None] * len(classes)
+    for _ in range(repeat):
+        for i, cls in enumerate(classes):
+            times = run(cls, frames)
+            best[i] = times if best[i] is None else tuple(map(min, best[i], times))
+    return [(total / count, data / count) for total, data in best]
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = "python -m benchmarks.per_byte", description = "Decode time per data byte of two HighLevelAnalyzer.py versions")
+    parser.add_argument("old", nargs = "?", default = OLD, help = "HighLevelAnalyzer.py to compare with (default: 1.0.1, tests/reference_hla.py)")
+    parser.add_argument("new", nargs = "?", default = NEW, help = "HighLevelAnalyzer.py to measure (default: this tree)")
+    parser.add_argument("--polls", type = int, default = 10000, help = "polls per register (default %(default)s)")
+    parser.add_argument("--repeat", type = int, default = 15, help = "runs, the best is taken (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    old = load(args.old, "old_hla")
+    new = load(args.new, "new_hla")
+
+    print("ns per data byte, %d pointer-write + 2-byte-read polls    all frames               data frames" % args.polls)
+    for name, register in REGISTERS:
+        frames = framegen.poll(register, args.polls)
+        before, after = per_byte((old, new), frames, args.repeat)
+        print("  %-14s %41s  %s" % (name, *("%5.0f -> %5.0f (%.2fx)" % (b, a, b / a) for b, a in zip(before, after))))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
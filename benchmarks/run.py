@@ -0,0 +1,128 @@
+'''
+Throughput of Hla.decode on synthetic frame streams.
+
+    python -m benchmarks.run                    run all scenarios
+    python -m benchmarks.run poll_hot_junc      run some scenarios
+    python -m benchmarks.run --save             store the results as baseline
+    python -m benchmarks.run --check            fail (exit 1) on a regression against the baseline
+
+Throughput is normalized with a short calibration loop, so a baseline stored on one machine
+can be checked on another (within reason).
+'''
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from mcp9600_offline import new_analyzer
+from . import framegen
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# allowed drop of the normalized throughput against the baseline
+TOLERANCE = 0.25
+
+def calibrate():
+    ''' seconds for a fixed amount of plain python work (best of 5) '''
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        d = {}
+        for i in range(200000):
+            d[i & 0xff] = d.get(i & 0xff, 0) + i
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def measure(frames, settings, repeat = 3):
+    ''' best decode time over repeat runs and peak memory (bytes) of one run '''
+    best = None
+    for _ in range(repeat):
+        hla = new_analyzer(settings)
+        decode = hla.decode
+        start = time.perf_counter()
+        for frame in frames:
+            decode(frame)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    hla = new_analyzer(settings)
+    decode = hla.decode
+    tracemalloc.start()
+    for frame in frames:
+        decode(frame)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, peak
+
+def run(names = None, scale = 1, repeat = 3):
+    ''' dict scenario -> results '''
+    calibration = calibrate()
+    results = {}
+
+    for name, (make_frames, settings) in framegen.scenarios(scale).items():
+        if names and name not in names:
+            continue
+
+        frames = make_frames()
+        data_bytes = sum(1 for frame in frames if frame.type == "data")
+        elapsed, peak = measure(frames, settings, repeat)
+
+        results[name] = {
+            "frames": len(frames),
+            "frames_per_s": round(len(frames) / elapsed),
+            "bytes_per_s": round(data_bytes / elapsed),
+            "peak_memory": peak,
+            "normalized": round(len(frames) / elapsed * calibration, 1),
+        }
+
+    return {"calibration_s": calibration, "python": sys.version.split()[0], "scenarios": results}
+
+def check(results, baseline, tolerance = TOLERANCE):
+    ''' list of regression messages '''
+    failed = []
+    for name, result in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        if result["normalized"] < base["normalized"] * (1 - tolerance):
+            failed.append("{}: {} < {} (normalized frames/s)".format(name, result["normalized"], base["normalized"]))
+    return failed
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = "python -m benchmarks.run", description = "Hla.decode throughput benchmarks")
+    parser.add_argument("scenario", nargs = "*", help = "scenarios to run (default all)")
+    parser.add_argument("--scale", type = int, default = 1, help = "multiply the stream length")
+    parser.add_argument("--repeat", type = int, default = 3, help = "timed runs per scenario, best is used")
+    parser.add_argument("--save", action = "store_true", help = "store the results as baseline")
+    parser.add_argument("--check", action = "store_true", help = "compare with the baseline, exit 1 on regression")
+    parser.add_argument("--tolerance", type = float, default = TOLERANCE, help = "allowed drop against the baseline (default %(default)s)")
+    parser.add_argument("--baseline", default = BASELINE, help = "baseline file")
+    args = parser.parse_args(argv)
+
+    results = run(args.scenario, args.scale, args.repeat)
+
+    print("{:22} {:>9} {:>12} {:>12} {:>12} {:>11}".format("scenario", "frames", "frames/s", "bytes/s", "peak mem", "normalized"))
+    for name, r in results["scenarios"].items():
+        print("{:22} {:>9} {:>12} {:>12} {:>12} {:>11}".format(name, r["frames"], r["frames_per_s"], r["bytes_per_s"], r["peak_memory"], r["normalized"]))
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent = 2)
+            f.write("\n")
+        print("baseline stored in", args.baseline)
+
+    if args.check:
+        with open(args.baseline) as f:
+            failed = check(results, json.load(f), args.tolerance)
+        for message in failed:
+            print("REGRESSION", message)
+        return 1 if failed else 0
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+'''
+Offline decoding of MCP9600 I2C traffic.
+
+Runs the Hla state machine of HighLevelAnalyzer.py outside Logic 2 on frames read from
+an exported I2C analyzer table. Everything is a generator pipeline, so memory use does
+not depend on the size of the capture.
+
+    python -m mcp9600_offline capture.csv -o decoded.jsonl
+'''
+import os
+import sys
+
+from . import saleae_standin
+
+# HighLevelAnalyzer.py lives in the folder above this package
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _root not in sys.path:
+    sys.path.append(_root)
+
+saleae_standin.install()
+
+from .decoder import new_analyzer, decode_frames
+from .capture import read_frames
+from .writers import write_csv, write_jsonl, csv_columns, WRITERS
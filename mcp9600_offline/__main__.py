@@ -0,0 +1,119 @@
+'''
+Command line: decode an exported I2C analyzer table.
+
+    python -m mcp9600_offline capture.csv                       (CSV to stdout)
+    python -m mcp9600_offline capture.csv -f jsonl -o out.jsonl
+    python -m mcp9600_offline capture.csv -j 0 -o out.csv      (one process per CPU)
+    cat capture.csv | python -m mcp9600_offline -
+    python -m mcp9600_offline capture.csv -o out.csv --index capture.idx   (also a time index, see index.py)
+    python -m mcp9600_offline capture.csv -o out.csv --columns capture.cols (also temperature columns, see columnar.py)
+    python -m mcp9600_offline capture.csv -o out.csv --stats stats.json     (decode counts and timing)
+    python -m mcp9600_offline capture.csv -o out.csv --checkpoints capture.ckpt (state checkpoints, see checkpoint.py)
+    python -m mcp9600_offline capture.i2clog -o out.csv                 (binary transaction log, see binlog.py)
+'''
+import argparse
+import contextlib
+import json
+import sys
+
+import HighLevelAnalyzer
+
+from . import read_frames, decode_frames, new_analyzer, csv_columns, WRITERS
+from .parallel import decode_parallel, CHUNK_SIZE
+from .index import IndexBuilder
+from .columnar import ColumnWriter
+from .checkpoint import CheckpointRecorder, CHECKPOINT_EVERY
+from .binlog import is_log, read_log
+
+def parse_args(argv = None):
+    parser = argparse.ArgumentParser(prog = "python -m mcp9600_offline", description = "Decode MCP9600 traffic from an exported Logic 2 I2C analyzer table")
+    parser.add_argument("input", help = "exported I2C analyzer table (CSV) or binary log (binlog.py), - for stdin (CSV)")
+    parser.add_argument("-o", "--output", default = "-", help = "output file, - for stdout (default)")
+    parser.add_argument("-f", "--format", choices = sorted(WRITERS), default = "csv", help = "output format (default csv)")
+    parser.add_argument("--analyzer", help = "only use rows of the analyzer with this name")
+    parser.add_argument("-j", "--jobs", type = int, default = 1, help = "decode with a pool of JOBS processes, 0 = one per CPU (default 1)")
+    parser.add_argument("--chunk-size", type = int, default = CHUNK_SIZE, help = "bytes of input per chunk with --jobs (default %(default)s)")
+    parser.add_argument("--index", metavar = "FILE", help = "also write a time index of the register accesses (decodes with one process)")
+    parser.add_argument("--columns", metavar = "DIR", help = "also write the temperature registers as memory-mappable columns (decodes with one process)")
+    parser.add_argument("--append", action = "store_true", help = "with --columns: append to the column set")
+    parser.add_argument("--stats", metavar = "FILE", help = "instrument the decoder, write the counts and timing histograms as JSON (- : stderr, decodes with one process)")
+    parser.add_argument("--checkpoints", metavar = "FILE", help = "also write state checkpoints, to decode a time window later (decodes with one process, not from stdin)")
+    parser.add_argument("--checkpoint-every", type = int, default = CHECKPOINT_EVERY, metavar = "N", help = "with --checkpoints: transactions between checkpoints (default %(default)s)")
+    parser.add_argument("--value-cache", choices = ("table", "lru"), help = "cache of the decoded 16-bit values (default table, see HighLevelAnalyzer.VALUE_CACHE_MODE)")
+    parser.add_argument("--value-cache-size", type = int, metavar = "N", help = "with --value-cache lru: values kept per register")
+    parser.add_argument("-s", "--setting", action = "append", default = [], metavar = "NAME=VALUE", help = "analyzer setting, can be repeated")
+    return parser.parse_args(argv)
+
+def parse_settings(items):
+    ''' NAME=VALUE strings to dict, numbers are converted to float '''
+    settings = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit("setting must be NAME=VALUE: " + item)
+        try:
+            value = float(value)
+        except ValueError:
+            pass
+        settings[name.strip()] = value
+    return settings
+
+def open_input(name):
+    if name == "-":
+        return contextlib.nullcontext(sys.stdin)
+    return open(name, newline = "")
+
+def open_output(name):
+    if name == "-":
+        return contextlib.nullcontext(sys.stdout)
+    return open(name, "w", newline = "")
+
+def main(argv = None):
+    args = parse_args(argv)
+    settings = parse_settings(args.setting)
+    if args.value_cache is not None:
+        HighLevelAnalyzer.set_value_cache(args.value_cache, args.value_cache_size)
+    log = args.input != "-" and is_log(args.input)
+
+    # split the capture over a pool of processes
+    if args.jobs != 1 and args.input != "-" and not log and args.index is None and args.columns is None and args.stats is None \
+            and args.checkpoints is None:
+        with open_output(args.output) as out:
+            decode_parallel(args.input, out, args.format, args.analyzer, settings, args.jobs or None, args.chunk_size)
+        return 0
+
+    hla = new_analyzer(settings)
+    if args.stats is not None:
+        hla.instrument()
+    index = IndexBuilder(hla) if args.index is not None else None
+    columns = ColumnWriter(hla, args.columns, append = args.append) if args.columns is not None else None
+
+    # the checkpoints need the file offsets of the rows
+    if args.checkpoints is not None:
+        if args.input == "-" or log:
+            raise SystemExit("--checkpoints needs an exported table (CSV) file as input")
+        recorder = CheckpointRecorder(hla, settings, args.checkpoint_every)
+        with open_output(args.output) as out:
+            WRITERS[args.format](recorder.decode(args.input, args.analyzer), out, columns = csv_columns(hla))
+        recorder.write(args.checkpoints)
+    elif log:
+        with open_output(args.output) as out:
+            WRITERS[args.format](decode_frames(read_log(args.input), hla), out, columns = csv_columns(hla))
+    else:
+        with open_input(args.input) as source, open_output(args.output) as out:
+            frames = decode_frames(read_frames(source, args.analyzer), hla)
+            WRITERS[args.format](frames, out, columns = csv_columns(hla))
+
+    if index is not None:
+        index.write(args.index)
+    if columns is not None:
+        columns.close()
+    if args.stats is not None:
+        with contextlib.nullcontext(sys.stderr) if args.stats == "-" else open(args.stats, "w") as f:
+            json.dump(hla.stats_report(), f, indent = 2)
+            f.write("\n")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
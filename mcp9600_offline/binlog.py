@@ -0,0 +1,226 @@
+'''
+Compact binary log of I2C transactions, to archive captures and decode them again quickly.
+
+An exported analyzer table has a text row with full timestamps for every frame. The log has one
+record per transaction (frames up to and including a stop) with the times as integer ticks:
+
+    header  <8sHHI : magic, version, 0, ticks per second (default 1e9 : 1 ns)
+    record  varint length of the frames, then the frames
+    frame   code byte : type (index in capture.FRAME_TYPES) | flags << 4 (bit 0 read, bit 1 ack)
+            address / data byte (address and data frames only)
+            zigzag varint : start - end of the frame before (ticks)
+            zigzag varint : duration - duration of the frame before of the same type (ticks)
+
+A data frame mostly takes 4 bytes instead of a row of about 60 characters.
+
+    python -m mcp9600_offline.binlog capture.csv capture.i2clog      (convert an exported table)
+    python -m mcp9600_offline capture.i2clog -o decoded.csv           (the log is recognized by its magic)
+
+    hla.decode_many(read_log("capture.i2clog"))
+
+The file is memory-mapped and read in place, one AnalyzerFrame is reused for all frames (as for
+Hla.decode_arrays): use a frame before the next one is read. Times are rounded to ticks, the
+decoded times are tick / ticks per second. Data frames always get an ack, also when the export had none.
+'''
+import argparse
+import mmap
+import struct
+import sys
+
+from .capture import FRAME_TYPES, read_frames
+from .stream import FRAME_CODES, ADDRESS, DATA, FLAG_READ, FLAG_ACK, _Data, _Address, _Empty
+
+MAGIC = b"MCP96LOG"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHHI")
+
+# default time resolution
+TICKS_PER_SECOND = 1000000000
+
+STOP = FRAME_CODES["stop"]
+
+# bytes of records the writer keeps before they are written
+WRITE_SIZE = 1 << 16
+
+def _varint(buffer, value):
+    ''' append value (>= 0) as LEB128 varint '''
+    while value > 0x7f:
+        buffer.append(value & 0x7f | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+def _zigzag(buffer, value):
+    ''' append a signed value as varint, small negative values stay small '''
+    _varint(buffer, value << 1 if value >= 0 else (-value << 1) - 1)
+
+def _read_varint(buffer, pos, byte):
+    ''' rest of a varint of more than one byte, byte : the first byte. returns (value, position after) '''
+    value = byte & 0x7f
+    shift = 7
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def is_log(path):
+    ''' True when the file starts as a binary log '''
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def write_log(frames, out, rate = TICKS_PER_SECOND):
+    '''
+    Write I2C analyzer frames as binary log to out (file opened in binary mode).
+    rate : ticks per second. returns (transactions, frames)
+    '''
+    out.write(HEADER.pack(MAGIC, VERSION, 0, rate))
+
+    buffer = bytearray()
+    body = bytearray()
+    clock = 0
+    durations = [0] * len(FRAME_TYPES)
+    transactions = count = 0
+
+    for frame in frames:
+        code = FRAME_CODES[frame.type]
+        data = frame.data
+
+        if code == ADDRESS:
+            body.append(code | ((FLAG_READ if data.get("read") else 0) | (FLAG_ACK if data.get("ack") else 0)) << 4)
+            body.append(data["address"][0])
+        elif code == DATA:
+            body.append(code | (FLAG_ACK if data.get("ack") else 0) << 4)
+            body.append(data["data"][0])
+        else:
+            body.append(code)
+
+        start = round(float(frame.start_time) * rate)
+        end = round(float(frame.end_time) * rate)
+        _zigzag(body, start - clock)
+        _zigzag(body, end - start - durations[code])
+        durations[code] = end - start
+        clock = end
+        count += 1
+
+        if code == STOP:
+            _varint(buffer, len(body))
+            buffer += body
+            body.clear()
+            transactions += 1
+            if len(buffer) >= WRITE_SIZE:
+                out.write(buffer)
+                buffer.clear()
+
+    # frames after the last stop (capture ended in a transaction)
+    if body:
+        _varint(buffer, len(body))
+        buffer += body
+        transactions += 1
+    out.write(buffer)
+
+    return transactions, count
+
+def read_log(source):
+    '''
+    generator: AnalyzerFrame of every frame in a binary log
+
+    source : path of the log, or a buffer with the log (bytes, mmap)
+    One AnalyzerFrame is reused for all frames: use it before the next frame.
+    '''
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            if not f.read(1):
+                raise ValueError("not an MCP9600 binary log (empty file): " + source)
+            with mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as buffer:
+                yield from read_log(buffer)
+        return
+
+    from saleae.analyzers import AnalyzerFrame
+
+    with memoryview(source) as buffer:
+        if len(buffer) < HEADER.size:
+            raise ValueError("not an MCP9600 binary log (too short)")
+        magic, version, flags, rate = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not an MCP9600 binary log (version %d)" % VERSION)
+
+        frame = AnalyzerFrame("", None, None)
+        types = FRAME_TYPES
+        data_frames = _Data
+        address_frames = _Address
+        read_varint = _read_varint
+        durations = [0] * len(types)
+        clock = 0
+        pos = HEADER.size
+        size = len(buffer)
+
+        while pos < size:
+            byte = buffer[pos]
+            pos += 1
+            length = byte if byte < 0x80 else None
+            if length is None:
+                length, pos = read_varint(buffer, pos, byte)
+            end_record = pos + length
+            if end_record > size:
+                raise ValueError("binary log ends in a record (truncated file)")
+
+            while pos < end_record:
+                code = buffer[pos]
+                typ = code & 0x0f
+                if typ == DATA:
+                    frame.data = data_frames[buffer[pos + 1] | code << 4 & 0x300]
+                    pos += 2
+                elif typ == ADDRESS:
+                    frame.data = address_frames[buffer[pos + 1] | code << 4 & 0x300]
+                    pos += 2
+                elif typ < len(types):
+                    frame.data = _Empty
+                    pos += 1
+                else:
+                    raise ValueError("unknown frame type in binary log: " + str(typ))
+
+                byte = buffer[pos]
+                pos += 1
+                if byte >= 0x80:
+                    byte, pos = read_varint(buffer, pos, byte)
+                start = clock + (byte >> 1 if not byte & 1 else -(byte + 1 >> 1))
+
+                byte = buffer[pos]
+                pos += 1
+                if byte >= 0x80:
+                    byte, pos = read_varint(buffer, pos, byte)
+                duration = durations[typ] + (byte >> 1 if not byte & 1 else -(byte + 1 >> 1))
+                durations[typ] = duration
+                clock = start + duration
+
+                frame.type = types[typ]
+                frame.start_time = start / rate
+                frame.end_time = clock / rate
+                yield frame
+
+def main(argv = None):
+    from .__main__ import open_input
+
+    parser = argparse.ArgumentParser(prog = "python -m mcp9600_offline.binlog", description = "Convert an exported I2C analyzer table (CSV) to a binary transaction log")
+    parser.add_argument("input", help = "exported I2C analyzer table (CSV), - for stdin")
+    parser.add_argument("output", help = "binary log, - for stdout")
+    parser.add_argument("--analyzer", help = "only use rows of the analyzer with this name")
+    parser.add_argument("--rate", type = int, default = TICKS_PER_SECOND, help = "time resolution, ticks per second (default %(default)s : 1 ns)")
+    args = parser.parse_args(argv)
+
+    with open_input(args.input) as source:
+        frames = read_frames(source, args.analyzer)
+        if args.output == "-":
+            transactions, count = write_log(frames, sys.stdout.buffer, args.rate)
+        else:
+            with open(args.output, "wb") as out:
+                transactions, count = write_log(frames, out, args.rate)
+
+    print("%d frames in %d transactions" % (count, transactions), file = sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
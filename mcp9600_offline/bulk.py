@@ -0,0 +1,159 @@
+'''
+Vectorized decoding of the temperature registers with NumPy.
+
+For offline analysis the register values are collected from the transaction stream first
+(SampleCollector), then converted in bulk:
+
+    hla = new_analyzer()
+    samples = SampleCollector(hla)
+    for frame in decode_frames(read_frames("capture.csv"), hla):
+        pass
+    series = decode_samples(*samples.arrays())
+    times, temps = series[HOT_JUNC_TEMP]
+
+NumPy is only needed for this module.
+'''
+import array
+
+try:
+    import numpy as np
+except ImportError:             # pragma: no cover
+    np = None
+
+from HighLevelAnalyzer import (DEV_RESOLUTION, RAW_ADC_LSB, HOT_JUNC_TEMP, DELTA_JUNC_TEMP, COLD_JUNC_TEMP, RAW_ADC,
+                               ALERT1_LIMIT, ALERT2_LIMIT, ALERT3_LIMIT, ALERT4_LIMIT)
+
+def _numpy():
+    if np is None:
+        raise ImportError("numpy is needed for bulk decoding: pip install numpy")
+    return np
+
+def junc_temperature(raw, resolution = DEV_RESOLUTION):
+    ''' HOT_JUNC_TEMP, DELTA_JUNC_TEMP, COLD_JUNC_TEMP raw values to °C, same as the 'temp' registers of the register map '''
+    np = _numpy()
+    raw = np.asarray(raw, dtype = np.int64)
+
+    # 16-bit two's complement, then the resolution
+    return np.where(raw & 0x8000, raw - 0x10000, raw) * resolution
+
+def alert_limit(raw):
+    ''' ALERTx_LIMIT raw values to °C, same as the 'limit' registers of the register map '''
+    np = _numpy()
+    raw = np.asarray(raw, dtype = np.int64)
+
+    # bits 15..4 whole degrees, bit 3 : 0.5, bit 2 : 0.25
+    return (raw >> 2) * 0.25
+
+def raw_adc(raw, resolution = None):
+    '''
+    RAW_ADC 24-bit values.
+
+    resolution : None returns the raw codes as shown in the frame text, else the ADC resolution in bits
+                 (18, 16, 14, 12) and the sign-extended value is returned in µV.
+    '''
+    np = _numpy()
+    raw = np.asarray(raw, dtype = np.int64)
+
+    if resolution is None:
+        return raw
+
+    signed = np.where(raw & 0x800000, raw - 0x1000000, raw)
+    return signed * RAW_ADC_LSB[resolution]
+
+# register -> vectorized decoder
+BULK_DECODERS = {
+    HOT_JUNC_TEMP   : junc_temperature,
+    DELTA_JUNC_TEMP : junc_temperature,
+    COLD_JUNC_TEMP  : junc_temperature,
+    RAW_ADC         : raw_adc,
+    ALERT1_LIMIT    : alert_limit,
+    ALERT2_LIMIT    : alert_limit,
+    ALERT3_LIMIT    : alert_limit,
+    ALERT4_LIMIT    : alert_limit,
+}
+
+def hook_decoders(hla, registers, recorder):
+    '''
+    Hook into the dispatch table of an Hla: the decoder of each register is replaced by one that calls
+    the original decoder and then record(reg_data), where record = recorder(register).
+    Used by SampleCollector, index.IndexBuilder and columnar.ColumnWriter.
+    '''
+    for register in registers:
+        decoder, width = hla.decoders[register]
+        record = recorder(register)
+
+        def collect(reg_data, decoder = decoder, record = record):
+            decoder(reg_data)
+            record(reg_data)
+
+        hla.decoders[register] = (collect, width)
+
+def decode_samples(times, registers, raw, resolution = DEV_RESOLUTION):
+    '''
+    Convert parallel arrays of samples.
+
+    times     : start time of the transaction (s)
+    registers : register pointer of each sample
+    raw       : raw register value of each sample
+    returns dict register -> (times, values) for every register in BULK_DECODERS that has samples
+    '''
+    np = _numpy()
+    times = np.asarray(times, dtype = np.float64)
+    registers = np.asarray(registers, dtype = np.uint8)
+    raw = np.asarray(raw, dtype = np.int64)
+
+    series = {}
+    for register in np.unique(registers).tolist():
+        decoder = BULK_DECODERS.get(register)
+        if decoder is None:
+            continue
+
+        select = registers == register
+        if decoder is junc_temperature:
+            values = decoder(raw[select], resolution)
+        else:
+            values = decoder(raw[select])
+
+        series[register] = (times[select], values)
+
+    return series
+
+class SampleCollector:
+    '''
+    Collect (time, register, raw value) of the 16/24-bit registers an Hla decodes.
+
+    Hooks into the dispatch table of the analyzer, the decoders are still called as before.
+    Samples are kept in compact arrays, not as python objects.
+    '''
+
+    def __init__(self, hla, registers = tuple(BULK_DECODERS)):
+        self.hla = hla
+        self.times = array.array("d")
+        self.registers = array.array("B")
+        self.raw = array.array("L")
+
+        hook_decoders(hla, registers, self.recorder)
+
+    def recorder(self, register):
+        ''' function that stores a sample of the register '''
+        hla = self.hla
+        add_time = self.times.append
+        add_register = self.registers.append
+        add_raw = self.raw.append
+
+        def record(reg_data):
+            add_time(float(hla.transaction.start_time))
+            add_register(register)
+            add_raw(reg_data)
+
+        return record
+
+    def __len__(self):
+        return len(self.times)
+
+    def arrays(self):
+        ''' (times, registers, raw) as NumPy arrays, no copy of the data '''
+        np = _numpy()
+        return (np.frombuffer(self.times, dtype = np.float64),
+                np.frombuffer(self.registers, dtype = np.uint8),
+                np.frombuffer(self.raw, dtype = np.dtype("u%d" % self.raw.itemsize)))
@@ -0,0 +1,105 @@
+'''
+Read frames from an I2C analyzer table exported by Logic 2 (Data -> Export Table).
+
+    name,type,start_time,duration,"ack","address","read","data"
+    "I2C","start",0.0001,8e-09,,,,
+    "I2C","address",0.00010002,9e-05,true,0x60,false,
+    "I2C","data",0.00019,9e-05,true,,,0x00
+    "I2C","stop",0.00028,8e-09,,,,
+'''
+import csv
+import datetime
+
+# frame types created by the Saleae I2C analyzer
+FRAME_TYPES = ("start", "address", "data", "stop", "error")
+
+def parse_time(text):
+    ''' seconds as float, also accepts ISO8601 timestamps '''
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+
+def parse_bool(text):
+    return text.strip().lower() in ("true", "1", "ack")
+
+def parse_byte(text):
+    return bytes((int(text, 0),))
+
+class Columns:
+    ''' column index of each field, taken from the header row '''
+
+    def __init__(self, header):
+        names = [h.strip().strip('"').lower() for h in header]
+        if "type" not in names or "start_time" not in names:
+            raise ValueError("not an exported I2C analyzer table, header: " + ",".join(header))
+
+        def index(name):
+            return names.index(name) if name in names else None
+
+        self.name = index("name")
+        self.type = index("type")
+        self.start_time = index("start_time")
+        self.duration = index("duration")
+        self.ack = index("ack")
+        self.address = index("address")
+        self.read = index("read")
+        self.data = index("data")
+
+def row_to_frame(row, col, AnalyzerFrame):
+    ''' one exported row as AnalyzerFrame, None for rows that are not I2C frames '''
+    typ = row[col.type]
+    if typ not in FRAME_TYPES:
+        return None
+
+    start = parse_time(row[col.start_time])
+    end = start + float(row[col.duration]) if col.duration is not None and row[col.duration] else start
+
+    data = {}
+    if typ == "address":
+        data["address"] = parse_byte(row[col.address])
+        data["read"] = parse_bool(row[col.read])
+        data["ack"] = parse_bool(row[col.ack])
+
+    elif typ == "data":
+        data["data"] = parse_byte(row[col.data])
+        if col.ack is not None:
+            data["ack"] = parse_bool(row[col.ack])
+
+    return AnalyzerFrame(typ, start, end, data)
+
+def read_rows(lines, analyzer = None, header = None):
+    '''
+    generator: (Columns, row) for every row, optionally only rows of one analyzer (name column)
+
+    header : header row, when the lines do not start with it (part of an export)
+    '''
+    reader = csv.reader(lines)
+    col = Columns(next(reader) if header is None else header)
+
+    for row in reader:
+        if not row:
+            continue
+        if analyzer is not None and col.name is not None and row[col.name] != analyzer:
+            continue
+        yield col, row
+
+def read_frames(source, analyzer = None, header = None):
+    '''
+    generator: AnalyzerFrame for every I2C frame in an exported table
+
+    source   : path of the exported file, or an iterable of text lines (open file, sys.stdin)
+    analyzer : only use rows with this analyzer name, when the export holds more analyzers
+    header   : header row, when source does not start with it
+    '''
+    from saleae.analyzers import AnalyzerFrame
+
+    if isinstance(source, str):
+        with open(source, newline = "") as lines:
+            yield from read_frames(lines, analyzer, header)
+        return
+
+    for col, row in read_rows(source, analyzer, header):
+        frame = row_to_frame(row, col, AnalyzerFrame)
+        if frame is not None:
+            yield frame
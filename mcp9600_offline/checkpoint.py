@@ -0,0 +1,223 @@
+'''
+State checkpoints of a decoded capture, to decode a time window without replaying the capture from the start.
+
+While decoding an exported capture, a snapshot of the analyzer state (Hla.get_state) is recorded
+every N transactions together with the file offset of the next row. A checkpoint is only taken
+after a stop where no read request is waiting for its responds, so it holds no half-decoded access.
+
+    python -m mcp9600_offline capture.csv -o decoded.csv --checkpoints capture.ckpt
+    python -m mcp9600_offline.checkpoint capture.csv capture.ckpt --start 3600 --end 3660 -o window.csv
+
+A window is decoded from the last checkpoint before its start: the file is read from the offset of
+that checkpoint and the state is restored. With the settings the checkpoints were recorded with, the
+frames are the same as those of decoding the whole capture. With other settings (e.g. to look at a
+range again with raw fields or a register filter) only the decode state of the devices is restored
+(register shadow, DEVICE_ID), what the settings keep over time (changes only, summaries, bus metrics)
+starts at the checkpoint.
+
+The checkpoint file has JSON lines: a header with the capture and settings, then one line per checkpoint
+with the state as Python literal (ast.literal_eval, no code is run when loading).
+'''
+import argparse
+import ast
+import bisect
+import json
+import os
+import sys
+
+from .capture import read_frames
+from .decoder import new_analyzer
+from .parallel import read_header
+from .writers import csv_columns, WRITERS
+
+VERSION = 1
+
+# transactions between checkpoints
+CHECKPOINT_EVERY = 10000
+
+class _Lines:
+    ''' text lines of a binary file, offset is the file offset after the last line returned '''
+
+    def __init__(self, f):
+        self.f = f
+        self.offset = f.tell()
+
+    def __iter__(self):
+        for line in self.f:
+            self.offset += len(line)
+            yield line.decode()
+
+class CheckpointRecorder:
+    '''
+    Decode an exported capture with an Hla and record a checkpoint every N transactions.
+
+    for frame in CheckpointRecorder(hla, settings).decode("capture.csv"): ...
+    then write("capture.ckpt")
+    '''
+
+    def __init__(self, hla, settings = None, every = CHECKPOINT_EVERY):
+        self.hla = hla
+        self.settings = dict(settings or {})
+        self.every = every
+        self.checkpoints = []           # (offset, time, transactions, state)
+        self.capture = None
+
+    def decode(self, path, analyzer = None, flush = True):
+        ''' generator: decoded frames of the capture at path (a file, the offsets are needed) '''
+        header, first = read_header(path)
+        self.capture = {"path": os.path.abspath(path), "size": os.path.getsize(path), "header": header, "first": first}
+
+        with open(path, "rb") as f:
+            f.seek(first)
+            lines = _Lines(f)
+            yield from self.hla.decode_many(self.frames(read_frames(lines, analyzer, header), lines))
+
+        if flush:
+            yield from self.hla.flush()
+
+    def frames(self, frames, lines):
+        '''
+        generator: the input frames, a checkpoint is taken when the frame after a stop is requested,
+        at that moment the stop is decoded and the next frame not yet
+        '''
+        hla = self.hla
+        transactions = 0
+        due = self.every
+        stop = None
+
+        for frame in frames:
+            if stop is not None:
+                if transactions >= due and self.quiet():
+                    self.checkpoints.append((stop[0], stop[1], transactions, hla.get_state()))
+                    due = transactions + self.every
+                stop = None
+
+            if frame.type == "stop":
+                transactions += 1
+                stop = (lines.offset, float(frame.end_time))
+
+            yield frame
+
+    def quiet(self):
+        ''' no read request waiting for its responds, on any device '''
+        hla = self.hla
+        if hla.pending_read is not None:
+            return False
+        for device in [hla.no_address] + hla.devices:
+            if device is not None and (device.ObtainMode or device.skip_responds):
+                return False
+        return True
+
+    def write(self, path):
+        ''' write the checkpoint file, returns the number of checkpoints '''
+        with open(path, "w") as f:
+            f.write(json.dumps({"version": VERSION, "capture": self.capture, "settings": self.settings, "every": self.every}) + "\n")
+            for offset, time, transactions, state in self.checkpoints:
+                f.write(json.dumps({"offset": offset, "time": time, "transactions": transactions, "state": repr(state)}) + "\n")
+
+        return len(self.checkpoints)
+
+class Checkpoints:
+    ''' checkpoint file written by CheckpointRecorder '''
+
+    def __init__(self, path):
+        with open(path) as f:
+            head = json.loads(f.readline())
+            if head.get("version") != VERSION:
+                raise ValueError("not an MCP9600 checkpoint file (version %d): %s" % (VERSION, path))
+
+            self.capture = head["capture"]
+            self.settings = head["settings"]
+            self.every = head["every"]
+            self.points = [json.loads(line) for line in f if line.strip()]
+
+        self.times = [point["time"] for point in self.points]
+
+    def __len__(self):
+        return len(self.points)
+
+    def find(self, time):
+        ''' last checkpoint at or before time, None : decode from the start of the capture '''
+        i = bisect.bisect_right(self.times, time)
+        return self.points[i - 1] if i > 0 else None
+
+def device_state(state):
+    '''
+    The part of an Hla state that does not depend on the settings: the decode state of the devices
+    without the changes only history and the summaries, no held read request and no bus metrics.
+    '''
+    devices = []
+    for item in state:
+        if item[0] in ('read', 'metrics'):
+            continue
+        address, (obtain, request, reg_data, reg_count, changes, summaries, *rest) = item
+        devices.append((address, (obtain, request, reg_data, reg_count, (), (), *rest)))
+    return tuple(devices)
+
+def decode_window(path, checkpoints, start = None, end = None, settings = None, analyzer = None):
+    '''
+    generator: decoded frames that start in start <= start time < end (s), decoded from the last
+    checkpoint before start. settings : None for the settings of the checkpoints.
+    The frames only the end of a capture outputs (repeats until the end, metrics report) are not in a window.
+    '''
+    if os.path.getsize(path) != checkpoints.capture["size"]:
+        raise ValueError("the capture is not the one of the checkpoints (size differs): " + path)
+
+    if settings is None:
+        settings = checkpoints.settings
+    hla = new_analyzer(settings)
+
+    point = checkpoints.find(start) if start is not None else None
+    offset = checkpoints.capture["first"]
+    if point is not None:
+        offset = point["offset"]
+        state = ast.literal_eval(point["state"])
+        hla.set_state(state if settings == checkpoints.settings else device_state(state))
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        frames = read_frames(_Lines(f), analyzer, checkpoints.capture["header"])
+
+        for frame in hla.decode_many(until(frames, end, hla)):
+            if start is not None and frame.start_time < start:
+                continue
+            if end is not None and frame.start_time >= end:
+                continue
+            yield frame
+
+def until(frames, end, hla):
+    '''
+    generator: frames up to the first start of a transaction at or after end, that start is
+    still decoded (it outputs the metrics of the window before). Continues while a merged read
+    request is held back, its frame starts before end.
+    '''
+    for frame in frames:
+        yield frame
+        if end is not None and frame.type == "start" and frame.start_time >= end and hla.pending_read is None:
+            return
+
+def main(argv = None):
+    from .__main__ import parse_settings, open_output
+
+    parser = argparse.ArgumentParser(prog = "python -m mcp9600_offline.checkpoint", description = "Decode a time window of a capture from its checkpoints (--checkpoints)")
+    parser.add_argument("input", help = "exported I2C analyzer table (CSV) the checkpoints were recorded from")
+    parser.add_argument("checkpoints", help = "checkpoint file")
+    parser.add_argument("--start", type = float, help = "from this time (s)")
+    parser.add_argument("--end", type = float, help = "until this time (s)")
+    parser.add_argument("-o", "--output", default = "-", help = "output file, - for stdout (default)")
+    parser.add_argument("-f", "--format", choices = sorted(WRITERS), default = "csv", help = "output format (default csv)")
+    parser.add_argument("--analyzer", help = "only use rows of the analyzer with this name")
+    parser.add_argument("-s", "--setting", action = "append", metavar = "NAME=VALUE", help = "analyzer setting, can be repeated (default: the settings of the checkpoints)")
+    args = parser.parse_args(argv)
+
+    checkpoints = Checkpoints(args.checkpoints)
+    settings = parse_settings(args.setting) if args.setting else None
+    columns = csv_columns(new_analyzer(settings if settings is not None else checkpoints.settings))
+
+    with open_output(args.output) as out:
+        WRITERS[args.format](decode_window(args.input, checkpoints, args.start, args.end, settings, args.analyzer), out, columns = columns)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
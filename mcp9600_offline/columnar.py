@@ -0,0 +1,159 @@
+'''
+Columnar output of the decoded temperature registers, for fast loading with numpy.memmap.
+
+A column set is a directory with one file of fixed-width values per column and meta.json
+with the number of rows and the dtype of each column:
+
+    time.bin        <f8   start time of the transaction (s)
+    address.bin     |u1   device address
+    register.bin    |u1   register pointer
+    raw.bin         <u4   raw register value
+    temp.bin        <f8   temperature (°C), NaN when the register has none (RAW_ADC)
+
+    python -m mcp9600_offline capture.csv -o decoded.csv --columns capture.cols
+
+    columns = open_columns("capture.cols")          # numpy.memmap per column, no copy
+    times, temps = series(columns, HOT_JUNC_TEMP, address = 0x60)
+
+Writing only needs the standard library, NumPy is only needed to open a column set.
+'''
+import array
+import json
+import math
+import os
+import sys
+
+from .bulk import BULK_DECODERS, _numpy, hook_decoders
+from .index import TEMPERATURES
+
+VERSION = 1
+META = "meta.json"
+
+# column name, array typecode, dtype (without byte order)
+COLUMNS = (
+    ("time", "d", "f8"),
+    ("address", "B", "u1"),
+    ("register", "B", "u1"),
+    ("raw", "I", "u4"),
+    ("temp", "d", "f8"),
+)
+
+# rows kept in memory before they are appended to the column files
+BLOCK_ROWS = 1 << 16
+
+def column_dtype(dtype):
+    ''' dtype with the byte order of this machine '''
+    if dtype.endswith("1"):
+        return "|" + dtype
+    return ("<" if sys.byteorder == "little" else ">") + dtype
+
+def read_meta(path):
+    with open(os.path.join(path, META)) as f:
+        meta = json.load(f)
+    if meta.get("version") != VERSION:
+        raise ValueError("not an MCP9600 column set (version %d): %s" % (VERSION, path))
+    return meta
+
+class ColumnWriter:
+    '''
+    Write the (time, address, register, raw, temp) rows of the registers an Hla decodes.
+
+    Hooks into the dispatch table of the analyzer (bulk.hook_decoders), the decoders are
+    still called as before. Rows are appended to the column files in blocks of BLOCK_ROWS.
+    append : add to an existing column set, else a new one is started.
+    '''
+
+    def __init__(self, hla, path, registers = tuple(BULK_DECODERS), append = False):
+        self.hla = hla
+        self.path = path
+        self.rows = 0
+
+        os.makedirs(path, exist_ok = True)
+        if append and os.path.exists(os.path.join(path, META)):
+            self.rows = read_meta(path)["rows"]
+
+        self.buffers = []
+        self.files = []
+        for name, typecode, dtype in COLUMNS:
+            self.buffers.append(array.array(typecode))
+            f = open(os.path.join(path, name + ".bin"), "r+b" if append and os.path.exists(os.path.join(path, name + ".bin")) else "wb")
+            f.seek(self.rows * self.buffers[-1].itemsize)
+            f.truncate()
+            self.files.append(f)
+
+        hook_decoders(hla, registers, self.recorder)
+
+    def recorder(self, register):
+        ''' function that adds a row of the register '''
+        hla = self.hla
+        times, addresses, registers, raw, temps = self.buffers
+        temperature = TEMPERATURES.get(register)
+
+        def record(reg_data):
+            address = hla.device.address
+            if address is None:
+                return
+
+            times.append(float(hla.transaction.start_time))
+            addresses.append(address)
+            registers.append(register)
+            raw.append(reg_data)
+            temps.append(temperature(reg_data) if temperature is not None else math.nan)
+
+            if len(times) >= BLOCK_ROWS:
+                self.flush()
+
+        return record
+
+    def flush(self):
+        ''' append the rows in memory to the column files '''
+        count = len(self.buffers[0])
+        for buffer, f in zip(self.buffers, self.files):
+            buffer.tofile(f)
+            del buffer[:]
+        self.rows += count
+
+    def close(self):
+        ''' write the last rows and meta.json, returns the number of rows '''
+        self.flush()
+        for f in self.files:
+            f.close()
+
+        meta = {
+            "version": VERSION,
+            "rows": self.rows,
+            "columns": {name: column_dtype(dtype) for name, typecode, dtype in COLUMNS},
+        }
+        with open(os.path.join(self.path, META), "w") as f:
+            json.dump(meta, f, indent = 2)
+
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_columns(path):
+    ''' column set as dict name -> read-only numpy.memmap, the data is not copied '''
+    np = _numpy()
+    meta = read_meta(path)
+    rows = meta["rows"]
+
+    columns = {}
+    for name, dtype in meta["columns"].items():
+        if rows == 0:
+            columns[name] = np.empty(0, dtype = dtype)
+        else:
+            columns[name] = np.memmap(os.path.join(path, name + ".bin"), dtype = dtype, mode = "r", shape = (rows,))
+    return columns
+
+def series(columns, register, address = None):
+    ''' (times, temps) of one register (and device address), temps are the raw values for RAW_ADC '''
+    select = columns["register"] == register
+    if address is not None:
+        select &= columns["address"] == address
+
+    values = columns["temp"] if register in TEMPERATURES else columns["raw"]
+    return columns["time"][select], values[select]
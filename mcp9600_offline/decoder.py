@@ -0,0 +1,40 @@
+'''
+Feed frames through the Hla state machine.
+'''
+from saleae.analyzers import StringSetting, NumberSetting, ChoicesSetting
+
+import HighLevelAnalyzer
+
+def new_analyzer(settings = None):
+    '''
+    Create an Hla the way Logic 2 does: the settings are set on the instance before __init__ is called.
+
+    settings : dict setting name -> value, settings not given get their default.
+    '''
+    settings = dict(settings or {})
+    hla = HighLevelAnalyzer.Hla.__new__(HighLevelAnalyzer.Hla)
+
+    for name in dir(HighLevelAnalyzer.Hla):
+        setting = getattr(HighLevelAnalyzer.Hla, name)
+        if isinstance(setting, (StringSetting, NumberSetting, ChoicesSetting)):
+            setattr(hla, name, settings.pop(name, setting.default))
+
+    if settings:
+        raise ValueError("unknown setting(s): " + ", ".join(sorted(settings)))
+
+    hla.__init__()
+    return hla
+
+def decode_frames(frames, hla = None, flush = True):
+    '''
+    generator: decode input frames, yield the frames created by the analyzer
+
+    flush : at the end, also yield the frames the analyzer still holds back (end of the capture)
+    '''
+    if hla is None:
+        hla = new_analyzer()
+
+    yield from hla.decode_many(frames)
+
+    if flush:
+        yield from hla.flush()
@@ -0,0 +1,265 @@
+'''
+Time index of the register accesses of a decoded capture.
+
+While decoding, every register value an Hla decodes is written to an index file: one
+fixed-size record per access, grouped per (device address, register) and sorted by start
+time within a group. The index is memory-mapped for reading and a query only looks at the
+records in the requested time range (binary search), the capture is not decoded again.
+
+    python -m mcp9600_offline capture.csv -o decoded.csv --index capture.idx
+
+    with TimeIndex("capture.idx") as index:
+        for access in index.query(register = HOT_JUNC_TEMP, start = t1, end = t2, min_temp = 300):
+            print(access.start_time, access.temp)
+
+    python -m mcp9600_offline.index capture.idx --register HOT_JUNC_TEMP --min-temp 300
+'''
+import argparse
+import bisect
+import collections
+import heapq
+import math
+import mmap
+import struct
+import sys
+import tempfile
+
+from HighLevelAnalyzer import (REGISTER_DECODERS, Temperature_Registers, Register_Names, junc_temp, alert_limit,
+                               ALERT1_LIMIT, ALERT2_LIMIT, ALERT3_LIMIT, ALERT4_LIMIT)
+
+from .bulk import hook_decoders
+
+MAGIC = b"MCP96IDX"
+VERSION = 1
+
+# file header: magic, version, number of groups
+HEADER = struct.Struct("<8sII")
+
+# group directory entry: address, register, offset of the first record, number of records
+GROUP = struct.Struct("<BB6xQQ")
+
+# record: start time (s), temperature (°C, NaN when not a temperature), raw value, address, register, flags
+RECORD = struct.Struct("<ddqBBB5x")
+
+# record flags
+FLAG_READ = 0x01                # read (responds), else a write
+
+# bytes of records a group keeps in memory before they are written to its spill file
+SPILL_SIZE = 1 << 20
+
+# registers with a temperature in the index
+TEMPERATURES = dict.fromkeys(Temperature_Registers, junc_temp)
+TEMPERATURES.update(dict.fromkeys((ALERT1_LIMIT, ALERT2_LIMIT, ALERT3_LIMIT, ALERT4_LIMIT), alert_limit))
+
+Access = collections.namedtuple("Access", "start_time address register read value temp")
+
+class _Group:
+    ''' records of one (address, register) while building, in time order '''
+
+    __slots__ = ('buffer', 'spill', 'count')
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.spill = None
+        self.count = 0
+
+class IndexBuilder:
+    '''
+    Collect the register accesses an Hla decodes and write them as index file.
+
+    Hooks into the dispatch table of the analyzer (bulk.hook_decoders), the decoders are
+    still called as before. Memory use is bounded, groups are spilled to temporary files.
+    '''
+
+    def __init__(self, hla, registers = tuple(REGISTER_DECODERS)):
+        self.hla = hla
+        self.groups = {}                # (address, register) -> _Group
+
+        hook_decoders(hla, registers, self.recorder)
+
+    def recorder(self, register):
+        ''' function that adds an access of the register to the index '''
+        hla = self.hla
+        groups = self.groups
+        pack = RECORD.pack
+        temperature = TEMPERATURES.get(register)
+
+        def record(reg_data):
+            address = hla.device.address
+            if address is None:
+                return
+
+            group = groups.get((address, register))
+            if group is None:
+                group = groups[(address, register)] = _Group()
+
+            tr = hla.transaction
+            temp = temperature(reg_data) if temperature is not None else math.nan
+            group.buffer += pack(float(tr.start_time), temp, reg_data, address, register, FLAG_READ if tr.read else 0)
+            group.count += 1
+
+            if len(group.buffer) >= SPILL_SIZE:
+                if group.spill is None:
+                    group.spill = tempfile.TemporaryFile()
+                group.spill.write(group.buffer)
+                group.buffer.clear()
+
+        return record
+
+    def __len__(self):
+        return sum(group.count for group in self.groups.values())
+
+    def write(self, path):
+        ''' write the index file, returns the number of records '''
+        groups = sorted(self.groups.items())
+
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(groups)))
+
+            offset = HEADER.size + len(groups) * GROUP.size
+            for (address, register), group in groups:
+                f.write(GROUP.pack(address, register, offset, group.count))
+                offset += group.count * RECORD.size
+
+            for key, group in groups:
+                if group.spill is not None:
+                    group.spill.seek(0)
+                    while True:
+                        block = group.spill.read(SPILL_SIZE)
+                        if not block:
+                            break
+                        f.write(block)
+                    group.spill.close()
+                    group.spill = None
+                f.write(group.buffer)
+                group.buffer = bytearray()
+
+        return sum(group.count for key, group in groups)
+
+class _StartTimes:
+    ''' start times of the records of a group as a sequence, for bisect '''
+
+    def __init__(self, buffer, offset, count):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return struct.unpack_from("<d", self.buffer, self.offset + i * RECORD.size)[0]
+
+class TimeIndex:
+    ''' memory-mapped index file written by IndexBuilder '''
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+
+        magic, version, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("not an MCP9600 index file (version %d): %s" % (VERSION, path))
+
+        # (address, register) -> (offset, count)
+        self.groups = {}
+        for i in range(count):
+            address, register, offset, records = GROUP.unpack_from(self.map, HEADER.size + i * GROUP.size)
+            self.groups[(address, register)] = (offset, records)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return sum(records for offset, records in self.groups.values())
+
+    def addresses(self):
+        return sorted({address for address, register in self.groups})
+
+    def registers(self):
+        return sorted({register for address, register in self.groups})
+
+    def records(self, address, register, start = None, end = None):
+        ''' generator: Access of one group with start <= start time < end, in time order '''
+        offset, count = self.groups.get((address, register), (0, 0))
+        times = _StartTimes(self.map, offset, count)
+
+        first = 0 if start is None else bisect.bisect_left(times, start)
+        last = count if end is None else bisect.bisect_left(times, end)
+
+        unpack = RECORD.unpack_from
+        for i in range(first, last):
+            start_time, temp, value, address, register, flags = unpack(self.map, offset + i * RECORD.size)
+            yield Access(start_time, address, register, bool(flags & FLAG_READ), value, None if math.isnan(temp) else temp)
+
+    def query(self, register = None, address = None, start = None, end = None, read = None,
+              min_value = None, max_value = None, min_temp = None, max_temp = None):
+        '''
+        generator: Access of the records that match, in time order over all groups.
+
+        register, address  : only this register / device address (None : all)
+        start, end         : start <= start time < end (s)
+        read               : True only reads, False only writes (None : both)
+        min/max_value      : raw value range (inclusive)
+        min/max_temp       : temperature range (inclusive), records without temperature do not match
+        '''
+        groups = [self.records(a, r, start, end) for a, r in sorted(self.groups)
+                  if (register is None or r == register) and (address is None or a == address)]
+
+        for access in heapq.merge(*groups, key = lambda access: access.start_time):
+            if read is not None and access.read != read:
+                continue
+            if min_value is not None and access.value < min_value:
+                continue
+            if max_value is not None and access.value > max_value:
+                continue
+            if min_temp is not None or max_temp is not None:
+                if access.temp is None:
+                    continue
+                if min_temp is not None and access.temp < min_temp:
+                    continue
+                if max_temp is not None and access.temp > max_temp:
+                    continue
+            yield access
+
+def parse_register(text):
+    ''' register name (HOT_JUNC_TEMP) or number '''
+    for register, name in Register_Names.items():
+        if name == text.upper():
+            return register
+    return int(text, 0)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = "python -m mcp9600_offline.index", description = "Query a time index written with --index")
+    parser.add_argument("index", help = "index file")
+    parser.add_argument("--register", type = parse_register, help = "register name or number")
+    parser.add_argument("--address", type = lambda text: int(text, 0), help = "device address")
+    parser.add_argument("--start", type = float, help = "from this time (s)")
+    parser.add_argument("--end", type = float, help = "until this time (s)")
+    parser.add_argument("--reads", dest = "read", action = "store_const", const = True, help = "only reads")
+    parser.add_argument("--writes", dest = "read", action = "store_const", const = False, help = "only writes")
+    parser.add_argument("--min-value", type = lambda text: int(text, 0))
+    parser.add_argument("--max-value", type = lambda text: int(text, 0))
+    parser.add_argument("--min-temp", type = float)
+    parser.add_argument("--max-temp", type = float)
+    args = parser.parse_args(argv)
+
+    with TimeIndex(args.index) as index:
+        print("start_time,address,register,read,value,temp")
+        for access in index.query(args.register, args.address, args.start, args.end, args.read,
+                                  args.min_value, args.max_value, args.min_temp, args.max_temp):
+            print("%r,%s,%s,%s,%s,%s" % (access.start_time, hex(access.address), Register_Names.get(access.register, hex(access.register)),
+                                        "true" if access.read else "false", hex(access.value), "" if access.temp is None else access.temp))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
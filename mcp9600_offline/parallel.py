@@ -0,0 +1,172 @@
+'''
+Decode a large exported capture with a pool of processes.
+
+The file is split in chunks that end right after an I2C stop, where Hla.decode has reset
+its per-transaction state. What is left is the state carried between transactions
+(Hla.get_state: a pending read request and a partial multi-byte register). Each chunk is
+decoded speculatively from the state of a fresh analyzer, and its end state is returned
+(including frames the analyzer holds back, they are only output after the last chunk).
+The chunks are merged in file (= timestamp) order. If the end state of the previous chunk
+differs from the state a chunk was decoded from, that chunk is decoded again in this process
+starting from the correct state. The output is identical to the sequential decoder.
+
+Chunks are preferably split after the stop of a read, as that normally leaves a fresh state.
+
+With changes only, temperature summaries, bus metrics or decode stats the state changes with
+every transaction, so every chunk would be decoded twice: those settings are decoded with one process.
+'''
+import collections
+import csv
+import io
+import multiprocessing
+import os
+import sys
+
+from .capture import read_frames
+from .decoder import new_analyzer, decode_frames
+from .writers import csv_columns, WRITERS
+
+# default chunk size in bytes of the input file
+CHUNK_SIZE = 16 * 1024 * 1024
+
+def read_header(path):
+    ''' header row and the offset of the first data row '''
+    with open(path, "rb") as f:
+        line = f.readline()
+        return next(csv.reader([line.decode()])), f.tell()
+
+def split_points(path, chunk_size = CHUNK_SIZE, analyzer = None):
+    '''
+    list of (start, end) offsets, each chunk ends right after a stop row
+    (of the analyzer, when the export holds more analyzers and one is decoded)
+    '''
+    header, start = read_header(path)
+    names = [h.strip().strip('"').lower() for h in header]
+    type_index = names.index("type")
+    name_index = names.index("name") if analyzer is not None and "name" in names else None
+    read_index = names.index("read") if "read" in names else None
+    size = os.path.getsize(path)
+
+    chunks = []
+    with open(path, "rb") as f:
+        while start < size:
+            target = start + chunk_size
+            if target >= size:
+                chunks.append((start, size))
+                break
+
+            # align on the next row, then look for a stop (after a read if possible)
+            f.seek(target)
+            f.readline()
+
+            end = None
+            after_read = False
+            for line in iter(f.readline, b""):
+                row = next(csv.reader([line.decode()]), None)
+                if not row or (name_index is not None and row[name_index] != analyzer):
+                    continue
+
+                if row[type_index] == "address" and read_index is not None:
+                    after_read = row[read_index].strip().lower() == "true"
+
+                elif row[type_index] == "stop":
+                    if end is None:
+                        end = f.tell()
+                    if after_read:
+                        end = f.tell()
+                        break
+
+                    # do not scan far for a read, a stop is good enough
+                    if f.tell() - target > chunk_size // 4:
+                        break
+
+            if end is None:
+                end = size
+            chunks.append((start, end))
+            start = end
+
+    return header, chunks
+
+def decode_chunk(job):
+    '''
+    Decode one chunk. Runs in a worker process.
+
+    job : (path, start, end, header, analyzer, settings, fmt, state)
+    returns (output text, state the chunk was decoded from, state at the end of the chunk)
+    '''
+    path, start, end, header, analyzer, settings, fmt, state = job
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        lines = io.StringIO(f.read(end - start).decode(), newline = "")
+
+    hla = new_analyzer(settings)
+    if state is None:
+        state = hla.get_state()
+    else:
+        hla.set_state(state)
+
+    out = io.StringIO()
+    WRITERS[fmt](decode_frames(read_frames(lines, analyzer, header), hla, flush = False), out, header = False, columns = csv_columns(hla))
+
+    return out.getvalue(), state, hla.get_state()
+
+def keeps_history(hla):
+    ''' True when the state of the analyzer changes with (nearly) every transaction, see above '''
+    return hla.changes_only or hla.summaries or hla.metrics is not None or hla.stats_time > 0
+
+def decode_parallel(path, out, fmt = "csv", analyzer = None, settings = None, jobs = None, chunk_size = CHUNK_SIZE):
+    '''
+    Decode the exported capture at path with a pool of jobs processes and write to out.
+    Returns the number of chunks that had to be decoded again with the correct start state.
+    '''
+    # analyzer for the header and the frames held back at the end
+    hla = new_analyzer(settings)
+
+    if keeps_history(hla):
+        print("changes only, summaries, metrics and stats are decoded with one process", file = sys.stderr)
+        WRITERS[fmt](decode_frames(read_frames(path, analyzer), hla), out, columns = csv_columns(hla))
+        return 0
+
+    header, chunks = split_points(path, chunk_size, analyzer)
+    jobs = jobs or os.cpu_count()
+
+    if fmt == "csv":
+        WRITERS[fmt]((), out, columns = csv_columns(hla))
+
+    redone = 0
+    state = None
+    pending = collections.deque()
+
+    with multiprocessing.Pool(jobs) as pool:
+        chunks = iter(chunks)
+
+        # keep a limited number of chunks in flight, so memory use stays bounded
+        for start, end in chunks:
+            pending.append(((start, end), pool.apply_async(decode_chunk, ((path, start, end, header, analyzer, settings, fmt, None),))))
+            if len(pending) >= 2 * jobs:
+                break
+
+        while pending:
+            (start, end), result = pending.popleft()
+            text, start_state, end_state = result.get()
+
+            # state carried over from the previous chunk differs: decode again from that state
+            if state is not None and state != start_state:
+                text, start_state, end_state = decode_chunk((path, start, end, header, analyzer, settings, fmt, state))
+                redone += 1
+
+            out.write(text)
+            state = end_state
+
+            # the next chunk starts from the last state known, as a guess (e.g. the register shadow hardly changes)
+            for start_next, end_next in chunks:
+                pending.append(((start_next, end_next), pool.apply_async(decode_chunk, ((path, start_next, end_next, header, analyzer, settings, fmt, state),))))
+                break
+
+    # end of the capture: frames still held back by the analyzer
+    if state is not None:
+        hla.set_state(state)
+        WRITERS[fmt](hla.flush(), out, header = False, columns = csv_columns(hla))
+
+    return redone
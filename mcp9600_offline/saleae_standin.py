@@ -0,0 +1,57 @@
+'''
+Local stand-in for the `saleae.analyzers` module of Logic 2.
+
+Only what HighLevelAnalyzer.py uses is provided, so the analyzer can run headless
+(CI, batch processing of exported captures). Frame times are plain floats in seconds.
+'''
+import sys
+import types
+
+class AnalyzerFrame:
+    """ frame as passed to and returned from a High Level Analyzer """
+
+    def __init__(self, type, start_time, end_time, data = None):
+        self.type = type
+        self.start_time = start_time
+        self.end_time = end_time
+        self.data = {} if data is None else data
+
+    def __repr__(self):
+        return "AnalyzerFrame({!r}, {!r}, {!r}, {!r})".format(self.type, self.start_time, self.end_time, self.data)
+
+class HighLevelAnalyzer:
+    """ base class of High Level Analyzers """
+    pass
+
+class StringSetting:
+    def __init__(self, label = None, **kwargs):
+        self.label = label
+        self.default = kwargs.get("default", "")
+
+class NumberSetting:
+    def __init__(self, label = None, min_value = None, max_value = None, **kwargs):
+        self.label = label
+        self.min_value = min_value
+        self.max_value = max_value
+        self.default = kwargs.get("default", 0.0 if min_value is None else float(min_value))
+
+class ChoicesSetting:
+    def __init__(self, choices, label = None, **kwargs):
+        self.choices = tuple(choices)
+        self.label = label
+        self.default = kwargs.get("default", self.choices[0])
+
+def install():
+    """ make `saleae.analyzers` importable, unless the real module is available """
+    try:
+        import saleae.analyzers
+        return
+    except ImportError:
+        pass
+
+    module = sys.modules[__name__]
+    package = types.ModuleType("saleae")
+    package.analyzers = module
+
+    sys.modules["saleae"] = package
+    sys.modules["saleae.analyzers"] = module
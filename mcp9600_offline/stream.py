@@ -0,0 +1,368 @@
+'''
+Decode live I2C frames from a Unix socket or a pipe, for continuous monitoring next to a bench rig.
+
+The producer (the process that captures the bus) writes every I2C frame as a fixed-size record:
+
+    FRAME   <BBBxdd : type, byte (address or data), flags, start time (s), end time (s)
+    type    index in capture.FRAME_TYPES : 0 start, 1 address, 2 data, 3 stop, 4 error
+    flags   bit 0 : read (address frame), bit 1 : ack
+
+The frames are decoded by an Hla as they arrive and the decoded frames are published to the
+subscribers, each with a bounded queue:
+
+    decoder = StreamDecoder({"read_frames": "Merged frame"})
+    readings = decoder.subscribe(types = ("readreg",))
+    asyncio.create_task(decode_source(decoder, "/tmp/mcp9600.sock"))
+    async for frame in readings:
+        print(frame.data["register"], frame.data["description"])
+
+Backpressure: when the queue of a subscriber is full the decoder waits for it. Reading from the
+socket / pipe then stops as well, so a producer that is too fast is held up by the kernel buffer
+instead of memory growing. A subscriber with drop = True loses its oldest frames instead (counted
+in dropped) and never holds up the decoder.
+
+    python -m mcp9600_offline.stream produce capture.csv --socket /tmp/mcp9600.sock   (stand-in producer)
+    python -m mcp9600_offline.stream decode /tmp/mcp9600.sock -f jsonl
+    python -m mcp9600_offline.stream produce capture.csv | python -m mcp9600_offline.stream decode -
+'''
+import argparse
+import asyncio
+import os
+import stat
+import struct
+import sys
+import time
+
+from . import read_frames, new_analyzer, csv_columns, WRITERS
+from .capture import FRAME_TYPES
+
+FRAME = struct.Struct("<BBBxdd")
+
+FRAME_CODES = {name: code for code, name in enumerate(FRAME_TYPES)}
+ADDRESS = FRAME_CODES["address"]
+DATA = FRAME_CODES["data"]
+
+# record flags
+FLAG_READ = 0x01
+FLAG_ACK = 0x02
+
+# bytes read from the source at a time (a whole number of records is decoded, the rest is kept)
+READ_SIZE = 1 << 16
+
+# bytes of records the producer writes at a time
+WRITE_SIZE = 1 << 14
+
+# frames a subscriber queue holds by default
+QUEUE_SIZE = 1024
+
+# data of the data / address frames: index byte | flags << 8, the analyzer does not change the data of input frames
+_Data = [{"data": bytes((i & 0xff,)), "ack": bool(i >> 8 & FLAG_ACK)} for i in range(0x400)]
+_Address = [{"address": bytes((i & 0xff,)), "read": bool(i >> 8 & FLAG_READ), "ack": bool(i >> 8 & FLAG_ACK)} for i in range(0x400)]
+_Empty = {}
+
+def encode_frame(frame):
+    ''' I2C analyzer frame as FRAME record '''
+    data = frame.data
+    byte = data["address"][0] if "address" in data else data["data"][0] if "data" in data else 0
+    flags = (FLAG_READ if data.get("read") else 0) | (FLAG_ACK if data.get("ack") else 0)
+    return FRAME.pack(FRAME_CODES[frame.type], byte, flags, float(frame.start_time), float(frame.end_time))
+
+def decode_records(buffer):
+    '''
+    generator: frame of every FRAME record in buffer (whole records only).
+
+    One AnalyzerFrame is reused for all records, as for Hla.decode_arrays: use it before the next record.
+    '''
+    from saleae.analyzers import AnalyzerFrame
+
+    frame = AnalyzerFrame("", None, None)
+    types = FRAME_TYPES
+    data_frames = _Data
+    address_frames = _Address
+
+    for code, byte, flags, frame.start_time, frame.end_time in FRAME.iter_unpack(buffer):
+        if code == DATA:
+            frame.data = data_frames[byte | flags << 8 & 0x300]
+        elif code == ADDRESS:
+            frame.data = address_frames[byte | flags << 8 & 0x300]
+        elif code < len(types):
+            frame.data = _Empty
+        else:
+            raise ValueError("unknown frame type in stream: " + str(code))
+
+        frame.type = types[code]
+        yield frame
+
+class Subscription:
+    '''
+    Decoded frames for one subscriber, async iterator until the stream ended.
+
+    types : only frames of these types (None : all)
+    drop  : when the queue is full drop the oldest frame, else the decoder waits
+    '''
+
+    def __init__(self, types = None, maxsize = QUEUE_SIZE, drop = False):
+        self.types = None if types is None else frozenset(types)
+        self.queue = asyncio.Queue(maxsize)
+        self.drop = drop
+        self.dropped = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.closed:
+            frame = await self.queue.get()
+            if frame is not None:
+                return frame
+            self.closed = True
+        raise StopAsyncIteration
+
+    async def batch(self):
+        ''' all frames in the queue, waits for at least one, [] when the stream ended '''
+        if self.closed:
+            return []
+
+        frames = [await self.queue.get()]
+        while not self.queue.empty():
+            frames.append(self.queue.get_nowait())
+
+        # end of the stream is always the last entry
+        if frames[-1] is None:
+            frames.pop()
+            self.closed = True
+        return frames
+
+    async def put(self, frame):
+        ''' add a frame (None : end of the stream), waits or drops when the queue is full '''
+        queue = self.queue
+        if queue.full():
+            if not self.drop:
+                await queue.put(frame)
+                return
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait(frame)
+
+class StreamDecoder:
+    '''
+    Decode frames as they arrive and publish the decoded frames to the subscribers.
+
+    settings : analyzer settings as for new_analyzer(), or hla : analyzer to use
+    '''
+
+    def __init__(self, settings = None, hla = None):
+        self.hla = new_analyzer(settings) if hla is None else hla
+        self.subscribers = []
+        self.frames = 0                 # input frames decoded
+        self.published = 0              # decoded frames published
+
+    def subscribe(self, types = None, maxsize = QUEUE_SIZE, drop = False):
+        ''' new Subscription, only gets the frames decoded from now on '''
+        subscription = Subscription(types, maxsize, drop)
+        self.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.remove(subscription)
+
+    async def publish(self, frame):
+        for subscription in self.subscribers:
+            if subscription.types is None or frame.type in subscription.types:
+                await subscription.put(frame)
+        self.published += 1
+
+    async def run(self, reader, flush = True):
+        '''
+        Decode the records of an asyncio StreamReader until the end of the stream, then close the subscriptions.
+
+        flush : at the end, also publish the frames the analyzer still holds back
+        '''
+        decode_many = self.hla.decode_many
+        publish = self.publish
+        rest = b""
+
+        try:
+            while True:
+                chunk = await reader.read(READ_SIZE)
+                if not chunk:
+                    break
+                if rest:
+                    chunk = rest + chunk
+
+                end = len(chunk) - len(chunk) % FRAME.size
+                rest = chunk[end:]
+
+                for frame in decode_many(decode_records(memoryview(chunk)[:end])):
+                    await publish(frame)
+                self.frames += end // FRAME.size
+
+            if rest:
+                raise ValueError("stream ended inside a frame record")
+
+            if flush:
+                for frame in self.hla.flush():
+                    await publish(frame)
+
+        finally:
+            for subscription in self.subscribers:
+                await subscription.put(None)
+
+async def decode_source(decoder, path, flush = True):
+    ''' run a StreamDecoder on a Unix socket (connect), a FIFO or stdin ("-") until the producer closes it '''
+    loop = asyncio.get_running_loop()
+
+    if path != "-" and stat.S_ISSOCK(os.stat(path).st_mode):
+        reader, writer = await asyncio.open_unix_connection(path)
+        try:
+            await decoder.run(reader, flush)
+        finally:
+            writer.close()
+        return
+
+    if path != "-" and not stat.S_ISFIFO(os.stat(path).st_mode):
+        raise ValueError("not a Unix socket or FIFO (decode files with python -m mcp9600_offline): " + path)
+
+    pipe = sys.stdin.buffer if path == "-" else open(path, "rb", buffering = 0)
+    reader = asyncio.StreamReader(limit = READ_SIZE)
+    transport, protocol = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    try:
+        await decoder.run(reader, flush)
+    finally:
+        transport.close()
+
+async def produce(writer, frames, rate = None):
+    '''
+    Stand-in producer: write frames as FRAME records to an asyncio StreamWriter.
+
+    rate : frames per second (None : as fast as the reader takes them)
+    '''
+    block = bytearray()
+    start = time.perf_counter()
+    count = 0
+
+    for frame in frames:
+        block += encode_frame(frame)
+        count += 1
+
+        if len(block) >= WRITE_SIZE:
+            writer.write(block)
+            block = bytearray()
+            await writer.drain()
+
+            if rate:
+                delay = start + count / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+    writer.write(block)
+    await writer.drain()
+    return count
+
+def replay(path, repeat = 1):
+    ''' generator: frames of an exported capture, repeat times, the times of each repeat after the previous one '''
+    frames = list(read_frames(path))
+    if not frames:
+        return
+
+    span = frames[-1].end_time - frames[0].start_time
+    for i in range(repeat):
+        if i > 0:
+            for frame in frames:
+                frame.start_time += span
+                frame.end_time += span
+        yield from frames
+
+async def serve_once(path, frames, rate = None):
+    ''' listen on a Unix socket, write the frames to the first producer connection and stop '''
+    done = asyncio.get_running_loop().create_future()
+
+    async def connected(reader, writer):
+        try:
+            done.set_result(await produce(writer, frames, rate))
+        except Exception as error:
+            done.set_exception(error)
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(connected, path)
+    try:
+        return await done
+    finally:
+        server.close()
+        os.unlink(path)
+
+async def write_frames(subscription, out, fmt, columns):
+    ''' subscriber that writes the decoded frames to an open text file, returns the number of frames '''
+    count = 0
+    header = True
+
+    while True:
+        frames = await subscription.batch()
+        if not frames:
+            break
+        count += WRITERS[fmt](frames, out, header = header, columns = columns)
+        header = False
+        out.flush()
+
+    return count
+
+async def decode_main(args):
+    from .__main__ import parse_settings, open_output
+
+    decoder = StreamDecoder(parse_settings(args.setting))
+    types = args.types.split(",") if args.types else None
+    subscription = decoder.subscribe(types, args.queue)
+
+    start = time.perf_counter()
+    with open_output(args.output) as out:
+        writer = asyncio.create_task(write_frames(subscription, out, args.format, csv_columns(decoder.hla)))
+        await decode_source(decoder, args.source)
+        count = await writer
+    elapsed = time.perf_counter() - start
+
+    print("{} frames in {:.2f}s ({:.0f} frames/s), {} decoded frames".format(
+          decoder.frames, elapsed, decoder.frames / elapsed if elapsed > 0 else 0, count), file = sys.stderr)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = "python -m mcp9600_offline.stream", description = "Decode live MCP9600 traffic from a Unix socket or pipe")
+    commands = parser.add_subparsers(dest = "command", required = True)
+
+    decode = commands.add_parser("decode", help = "decode FRAME records and write the decoded frames")
+    decode.add_argument("source", help = "Unix socket of the producer, FIFO, or - for stdin")
+    decode.add_argument("-o", "--output", default = "-", help = "output file, - for stdout (default)")
+    decode.add_argument("-f", "--format", choices = sorted(WRITERS), default = "jsonl", help = "output format (default jsonl)")
+    decode.add_argument("--types", help = "only output frames of these types (comma separated)")
+    decode.add_argument("--queue", type = int, default = QUEUE_SIZE, help = "frames in the output queue (default %(default)s)")
+    decode.add_argument("-s", "--setting", action = "append", default = [], metavar = "NAME=VALUE", help = "analyzer setting, can be repeated")
+
+    producer = commands.add_parser("produce", help = "stand-in producer: replay an exported capture as FRAME records")
+    producer.add_argument("capture", help = "exported I2C analyzer table (CSV)")
+    producer.add_argument("--socket", help = "listen on this Unix socket (one connection), else write to stdout")
+    producer.add_argument("--rate", type = float, help = "frames per second (default: as fast as possible)")
+    producer.add_argument("--repeat", type = int, default = 1, help = "replay the capture this many times")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "decode":
+        try:
+            asyncio.run(decode_main(args))
+        except (OSError, ValueError) as error:
+            raise SystemExit(str(error))
+
+    elif args.socket is not None:
+        asyncio.run(serve_once(args.socket, replay(args.capture, args.repeat), args.rate))
+
+    else:
+        out = sys.stdout.buffer
+        for frame in replay(args.capture, args.repeat):
+            out.write(encode_frame(frame))
+        out.flush()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
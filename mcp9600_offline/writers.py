@@ -0,0 +1,54 @@
+'''
+Write decoded frames as CSV or JSON lines.
+'''
+import csv
+import json
+
+# CSV columns, data keys not in this list are left out
+CSV_COLUMNS = ("type", "start_time", "end_time", "address", "description", "action", "data", "count")
+
+# CSV columns with Frame text : raw fields
+FIELD_COLUMNS = ("type", "start_time", "end_time", "address", "register", "pointer", "data", "count", "temp")
+
+def csv_columns(hla):
+    ''' CSV columns for the frames of an analyzer '''
+    return FIELD_COLUMNS if hla.fields_only else CSV_COLUMNS
+
+def frame_record(frame):
+    ''' frame as flat dict: type, start/end time and the frame data '''
+    record = {
+        "type": frame.type,
+        "start_time": float(frame.start_time),
+        "end_time": float(frame.end_time),
+    }
+    record.update(frame.data)
+    return record
+
+def write_csv(frames, out, header = True, columns = CSV_COLUMNS):
+    ''' write frames to an open text file, returns number of frames written '''
+    writer = csv.writer(out, lineterminator = "\n")
+    if header:
+        writer.writerow(columns)
+
+    count = 0
+    for frame in frames:
+        record = frame_record(frame)
+        writer.writerow([record.get(c, "") for c in columns])
+        count += 1
+
+    return count
+
+def write_jsonl(frames, out, header = True, columns = None):
+    ''' write frames to an open text file, one JSON object per line, returns number of frames written (no header, all data keys) '''
+    count = 0
+    for frame in frames:
+        out.write(json.dumps(frame_record(frame), ensure_ascii = False))
+        out.write("\n")
+        count += 1
+
+    return count
+
+WRITERS = {
+    "csv": write_csv,
+    "jsonl": write_jsonl,
+}
@@ -0,0 +1,130 @@
+'''
+Shared helpers of the tests: random I2C traffic as the Saleae I2C analyzer passes it, the settings
+to compare the decode paths with and an exported capture (CSV) of that traffic.
+
+    python -m pytest tests
+'''
+import os
+import random
+import sys
+
+import pytest
+
+# the repository root holds HighLevelAnalyzer.py and mcp9600_offline
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mcp9600_offline             # installs the saleae stand-in when needed
+from saleae.analyzers import AnalyzerFrame
+
+import HighLevelAnalyzer as H
+
+# registers of the random traffic, with the number of data bytes of a read
+REGISTERS = {
+    H.HOT_JUNC_TEMP: 2, H.DELTA_JUNC_TEMP: 2, H.COLD_JUNC_TEMP: 2, H.RAW_ADC: 3, H.SENSOR_STATUS: 1,
+    H.THERMO_SENSOR_CONFIG: 1, H.DEVICE_CONFIG: 1, H.ALERT1_CONFIG: 1, H.ALERT3_CONFIG: 1, H.ALERT2_HYSTERESIS: 1,
+    H.ALERT1_LIMIT: 2, H.ALERT4_LIMIT: 2, H.DEVICE_ID: 2, 0x07: 1, 0x30: 1,
+}
+
+# the decode paths have to give the same frames with each of these settings
+SETTINGS = [
+    {},
+    {"read_frames": H.READ_MERGED},
+    {"emit_frames": H.EMIT_CHANGES, "deadband": 0.5},
+    {"summary": H.SUMMARY_INSTEAD, "summary_reads": 5},
+    {"summary": H.SUMMARY_ALONGSIDE, "summary_interval": 0.05, "emit_frames": H.EMIT_CHANGES},
+    {"frame_text": H.TEXT_FIELDS},
+    {"frame_text": H.TEXT_FIELDS, "read_frames": H.READ_MERGED, "metrics_interval": 0.05},
+    {"metrics_interval": 0.02},
+    {"address_filter": "0x60"},
+    {"registers_exclude": "SENSOR_STATUS, 0x30"},
+    {"registers_include": "HOT_JUNC_TEMP DEVICE_ID", "read_frames": H.READ_MERGED},
+]
+
+def settings_id(settings):
+    return ",".join("%s=%s" % item for item in sorted(settings.items())) or "default"
+
+def random_frames(count = 3000, seed = 1, addresses = (0x60, 0x60, 0x61, 0x67, 0x20)):
+    '''
+    count transactions: register reads (pointer write + read, sometimes with the wrong number of bytes),
+    register writes, pings / NACKs and bus errors, on more addresses
+    '''
+    rnd = random.Random(seed)
+    registers = sorted(REGISTERS)
+    frames = []
+    time = 0.0
+
+    def add(type, **data):
+        nonlocal time
+        frames.append(AnalyzerFrame(type, time, time + 90e-6, data))
+        time += 100e-6
+
+    for _ in range(count):
+        address = bytes((rnd.choice(addresses),))
+        register = rnd.choice(registers)
+        kind = rnd.random()
+
+        add("start")
+        if kind < 0.05:
+            add("address", address = address, read = rnd.random() < 0.5, ack = rnd.random() < 0.5)
+        elif kind < 0.55:
+            add("address", address = address, read = False, ack = True)
+            add("data", data = bytes((register,)), ack = True)
+            add("stop")
+            add("start")
+            add("address", address = address, read = True, ack = rnd.random() < 0.97)
+            width = REGISTERS[register] if rnd.random() < 0.9 else rnd.randint(0, 4)
+            for _ in range(width):
+                # DEVICE_ID of an MCP9600 or MCP9601
+                byte = rnd.choice((H.MCP9600_ID, H.MCP9601_ID)) if register == H.DEVICE_ID else rnd.randrange(256)
+                add("data", data = bytes((byte,)), ack = True)
+        else:
+            add("address", address = address, read = False, ack = True)
+            add("data", data = bytes((register,)), ack = True)
+            for _ in range(rnd.choice((1, 1, 2, 3))):
+                add("data", data = bytes((rnd.randrange(256),)), ack = True)
+        if rnd.random() < 0.02:
+            add("error")
+        add("stop")
+        time += rnd.choice((100e-6, 1e-3, 10e-3))
+
+    return frames
+
+def write_capture(frames, path, names = None):
+    '''
+    frames as table exported by Logic 2 (Data -> Export Table)
+
+    names : analyzer name of each frame, default I2C
+    '''
+    def flag(value):
+        return "true" if value else "false"
+
+    with open(path, "w") as f:
+        f.write('name,type,start_time,duration,"ack","address","read","data"\n')
+        for i, frame in enumerate(frames):
+            data = frame.data
+            f.write('"%s","%s",%r,%r,%s,%s,%s,%s\n' % (
+                "I2C" if names is None else names[i], frame.type, frame.start_time, frame.end_time - frame.start_time,
+                flag(data["ack"]) if "ack" in data else "",
+                hex(data["address"][0]) if "address" in data else "",
+                flag(data["read"]) if "read" in data else "",
+                hex(data["data"][0]) if "data" in data else ""))
+
+def records(frames):
+    ''' output frames as comparable tuples, lists are flattened, None is left out '''
+    out = []
+    for frame in frames:
+        if frame is None:
+            continue
+        for f in frame if isinstance(frame, list) else [frame]:
+            out.append((f.type, f.start_time, f.end_time, sorted(f.data.items())))
+    return out
+
+@pytest.fixture(scope = "session")
+def frames():
+    return random_frames()
+
+@pytest.fixture(scope = "session")
+def capture(tmp_path_factory, frames):
+    path = tmp_path_factory.mktemp("capture") / "capture.csv"
+    write_capture(frames, str(path))
+    return str(path)
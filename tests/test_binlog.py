@@ -0,0 +1,51 @@
+'''
+A binary log gives back the frames it was written from (times rounded to ticks) and decodes the same,
+a truncated log is an error.
+'''
+import io
+
+import pytest
+
+from mcp9600_offline import decode_frames, new_analyzer
+from mcp9600_offline.binlog import write_log, read_log, is_log
+
+from conftest import records
+
+def log_bytes(frames, rate = 1000000000):
+    out = io.BytesIO()
+    assert write_log(frames, out, rate)[1] == len(frames)
+    return out.getvalue()
+
+def rounded(records, digits = 9):
+    return [(type, round(start, digits), round(end, digits), data) for type, start, end, data in records]
+
+@pytest.mark.parametrize("rate", [1000000000, 1000000])
+def test_round_trip(frames, rate):
+    log = log_bytes(frames, rate)
+    digits = 9 if rate == 1000000000 else 6
+
+    # the frame is reused, take its values while reading
+    back = [(frame.type, frame.start_time, frame.end_time, sorted(frame.data.items())) for frame in read_log(log)]
+    assert rounded(back, digits) == rounded(records(frames), digits)
+
+def test_decode(frames, tmp_path):
+    path = str(tmp_path / "capture.i2clog")
+    with open(path, "wb") as f:
+        f.write(log_bytes(frames))
+    assert is_log(path)
+
+    expected = records(decode_frames(frames, new_analyzer()))
+    assert rounded(records(decode_frames(read_log(path), new_analyzer()))) == rounded(expected)
+
+def test_truncated(frames, tmp_path):
+    log = log_bytes(frames)
+    path = str(tmp_path / "truncated.i2clog")
+    with open(path, "wb") as f:
+        f.write(log[:-5])
+
+    with pytest.raises(ValueError, match = "truncated"):
+        for frame in read_log(path):
+            pass
+
+    with pytest.raises(ValueError, match = "not an MCP9600 binary log"):
+        list(read_log(log[:10]))
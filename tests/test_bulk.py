@@ -0,0 +1,45 @@
+'''
+The vectorized decoding of mcp9600_offline.bulk gives the temperatures of the register map.
+'''
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import HighLevelAnalyzer as H
+from mcp9600_offline import new_analyzer
+from mcp9600_offline.bulk import SampleCollector, decode_samples, junc_temperature
+
+TEMPERATURES = {H.HOT_JUNC_TEMP: "HOT_JUNC_TEMP", H.DELTA_JUNC_TEMP: "DELTA_JUNC_TEMP", H.COLD_JUNC_TEMP: "COLD_JUNC_TEMP"}
+
+def test_junc_temperature():
+    raw = list(range(0, 0x10000, 7)) + [0x7fff, 0x8000, 0xff00, 0xffff]
+    assert junc_temperature(raw).tolist() == [H.junc_temp(value) for value in raw]
+
+    # other resolution: the same signed value, other scale
+    assert junc_temperature([0x0004, 0xfffc, 0x8000], 0.25).tolist() == [1.0, -1.0, -8192.0]
+
+@pytest.mark.parametrize("resolution", [H.DEV_RESOLUTION, 0.25])
+def test_decode_samples(frames, resolution):
+    ''' the samples collected while decoding, converted in one go, against the temperatures of Hla.decode '''
+    hla = new_analyzer({"frame_text": H.TEXT_FIELDS})
+    samples = SampleCollector(hla)
+
+    # the last temperature of each transaction (a write of 4 bytes holds 2 values)
+    expected = {register: {} for register in TEMPERATURES}
+    for frame in frames:
+        out = hla.decode(frame)
+        for f in out if isinstance(out, list) else [out]:
+            if f is not None and f.type == "field_temp" and f.data["pointer"] in TEMPERATURES:
+                expected[f.data["pointer"]][float(f.start_time)] = f.data["temp"] * resolution / H.DEV_RESOLUTION
+
+    series = decode_samples(*samples.arrays(), resolution = resolution)
+    negative = 0
+    for register in TEMPERATURES:
+        times, temps = series[register]
+        got = dict(zip(times.tolist(), temps.tolist()))
+
+        # the samples also hold the values of transactions with a bus error (no temp in the frame)
+        got = {time: got[time] for time in expected[register]}
+        assert got == pytest.approx(expected[register])
+        negative += sum(1 for temp in got.values() if temp < 0)
+    assert negative > 100
@@ -0,0 +1,32 @@
+'''
+A time window decoded from a checkpoint holds the frames of the same range of a decode of the whole capture.
+'''
+import random
+
+import pytest
+
+from mcp9600_offline import read_frames, decode_frames, new_analyzer
+from mcp9600_offline.checkpoint import CheckpointRecorder, Checkpoints, decode_window
+
+from conftest import SETTINGS, settings_id, records
+
+@pytest.mark.parametrize("settings", SETTINGS, ids = settings_id)
+def test_window(capture, tmp_path, settings):
+    recorder = CheckpointRecorder(new_analyzer(settings), settings, every = 37)
+    full = list(recorder.decode(capture, flush = False))
+    path = str(tmp_path / "capture.ckpt")
+    recorder.write(path)
+
+    # recording checkpoints does not change the frames
+    assert records(full) == records(decode_frames(read_frames(capture), new_analyzer(settings), flush = False))
+
+    checkpoints = Checkpoints(path)
+    assert len(checkpoints) > 20
+
+    rnd = random.Random(5)
+    first, last = full[0].start_time, full[-1].end_time
+    for _ in range(10):
+        start = rnd.uniform(first, last)
+        end = start + rnd.uniform(0, (last - first) / 5)
+        expected = records(frame for frame in full if start <= frame.start_time < end)
+        assert records(decode_window(capture, checkpoints, start, end, settings)) == expected, (start, end)
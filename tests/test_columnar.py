@@ -0,0 +1,67 @@
+'''
+A column set written in two runs (--append) holds the rows of one run, open_columns() and series()
+give the temperatures of the decoded frames.
+'''
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import HighLevelAnalyzer as H
+from mcp9600_offline import decode_frames, new_analyzer
+from mcp9600_offline.columnar import ColumnWriter, open_columns, series
+
+def write(frames, path, append = False, state = None):
+    ''' decode frames into the column set, returns the state of the analyzer at the end '''
+    hla = new_analyzer({"frame_text": H.TEXT_FIELDS})
+    if state is not None:
+        hla.set_state(state)
+    with ColumnWriter(hla, path, append = append):
+        for frame in decode_frames(frames, hla, flush = False):
+            pass
+    return hla.get_state()
+
+def test_append(frames, tmp_path):
+    whole = str(tmp_path / "whole.cols")
+    write(frames, whole)
+
+    # the second run continues after a stop, with the state the first run ended with
+    cut = [i + 1 for i, frame in enumerate(frames) if frame.type == "stop"][1000]
+    parts = str(tmp_path / "parts.cols")
+    state = write(frames[:cut], parts)
+    first = len(open_columns(parts)["time"])
+    write(frames[cut:], parts, append = True, state = state)
+
+    expected = open_columns(whole)
+    columns = open_columns(parts)
+    assert 0 < first < len(columns["time"])
+    assert sorted(columns) == sorted(expected)
+    for name in expected:
+        np.testing.assert_array_equal(columns[name], expected[name])
+
+    # a new set without --append starts again
+    write(frames[:cut], parts)
+    assert len(open_columns(parts)["time"]) == first
+
+def test_series(frames, tmp_path):
+    path = str(tmp_path / "capture.cols")
+    write(frames, path)
+    columns = open_columns(path)
+    assert isinstance(columns["temp"], np.memmap)
+
+    # temperatures of the raw fields frames
+    hla = new_analyzer({"frame_text": H.TEXT_FIELDS})
+    expected = {}
+    for frame in decode_frames(frames, hla):
+        if frame.type == "field_temp" and frame.data["pointer"] == H.HOT_JUNC_TEMP and frame.data["address"] == "0x60":
+            expected[float(frame.start_time)] = frame.data["temp"]
+
+    times, temps = series(columns, H.HOT_JUNC_TEMP, 0x60)
+    got = dict(zip(times.tolist(), temps.tolist()))
+
+    # the columns also hold the values of transactions with a bus error (no temp in the frame)
+    assert len(got) >= len(expected) > 50
+    assert {time: got[time] for time in expected} == expected
+
+    # RAW_ADC has no temperature, the raw values
+    times, raw = series(columns, H.RAW_ADC)
+    assert len(raw) and raw.dtype == np.uint32
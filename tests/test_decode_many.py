@@ -0,0 +1,44 @@
+'''
+Hla.decode_many() and Hla.decode_arrays() give the same frames as decode() frame by frame.
+'''
+import pytest
+
+from benchmarks import framegen
+from mcp9600_offline import new_analyzer
+
+from conftest import SETTINGS, settings_id, records
+
+def decode_each(hla, frames):
+    return records([hla.decode(frame) for frame in frames] + hla.flush())
+
+def decode_many(hla, frames):
+    return records(list(hla.decode_many(frames)) + hla.flush())
+
+def decode_arrays(hla, frames):
+    out = list(hla.decode_arrays([f.type for f in frames], [f.data for f in frames],
+                                 [f.start_time for f in frames], [f.end_time for f in frames]))
+    return records(out + hla.flush())
+
+@pytest.mark.parametrize("settings", SETTINGS, ids = settings_id)
+def test_random_traffic(frames, settings):
+    expected = decode_each(new_analyzer(settings), frames)
+    assert expected
+    assert decode_many(new_analyzer(settings), frames) == expected
+    assert decode_arrays(new_analyzer(settings), frames) == expected
+
+@pytest.mark.parametrize("name", sorted(framegen.scenarios()))
+def test_benchmark_scenarios(name):
+    make, settings = framegen.scenarios()[name]
+    frames = make()[:20000]
+    expected = decode_each(new_analyzer(settings), frames)
+    assert decode_many(new_analyzer(settings), frames) == expected
+    assert decode_arrays(new_analyzer(settings), frames) == expected
+
+def test_instrumented(frames):
+    ''' with the decode stats on, decode_many goes through decode() '''
+    settings = {"stats_interval": 0.05}
+    expected = decode_each(new_analyzer(settings), frames)
+    assert [r for r in expected if r[0] == "stats"]
+    # the stats frames hold timings, only compare the other frames
+    many = decode_many(new_analyzer(settings), frames)
+    assert [r for r in many if r[0] != "stats"] == [r for r in expected if r[0] != "stats"]
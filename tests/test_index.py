@@ -0,0 +1,79 @@
+'''
+TimeIndex.query() with its binary search gives the accesses a scan of all records gives.
+'''
+import random
+
+import pytest
+
+import HighLevelAnalyzer as H
+from mcp9600_offline import decode_frames, new_analyzer
+from mcp9600_offline.index import IndexBuilder, TimeIndex
+
+@pytest.fixture(scope = "module")
+def index(frames, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("index") / "capture.idx")
+    hla = new_analyzer()
+    builder = IndexBuilder(hla)
+    for frame in decode_frames(frames, hla):
+        pass
+    assert builder.write(path) == len(builder) > 1000
+
+    with TimeIndex(path) as index:
+        yield index
+
+def scan(index, register = None, address = None, start = None, end = None, read = None,
+         min_value = None, max_value = None, min_temp = None, max_temp = None):
+    ''' every record of the index, filtered one by one '''
+    out = []
+    for a, r in sorted(index.groups):
+        for access in index.records(a, r):
+            if register is not None and access.register != register or address is not None and access.address != address:
+                continue
+            if start is not None and access.start_time < start or end is not None and access.start_time >= end:
+                continue
+            if read is not None and access.read != read:
+                continue
+            if min_value is not None and access.value < min_value or max_value is not None and access.value > max_value:
+                continue
+            if min_temp is not None or max_temp is not None:
+                if access.temp is None or min_temp is not None and access.temp < min_temp or \
+                   max_temp is not None and access.temp > max_temp:
+                    continue
+            out.append(access)
+    return sorted(out, key = lambda access: access.start_time)
+
+def test_records(index):
+    ''' a record per register value, temperatures as in the register map '''
+    accesses = scan(index)
+    assert len(accesses) == len(index)
+    assert {access.address for access in accesses} == {0x60, 0x61, 0x67, 0x20}
+    for access in accesses:
+        if access.register in H.Temperature_Registers:
+            assert access.temp == H.junc_temp(access.value)
+        elif access.register == H.DEVICE_ID:
+            assert access.temp is None
+
+def test_query(index, frames):
+    rnd = random.Random(3)
+    end = frames[-1].end_time
+    registers = index.registers()
+    found = 0
+    for _ in range(200):
+        start = rnd.uniform(0, end)
+        query = {
+            "register": rnd.choice([None] + registers),
+            "address": rnd.choice((None, 0x60, 0x61, 0x20)),
+            "start": rnd.choice((None, start)),
+            "end": rnd.choice((None, start + rnd.uniform(0, end / 4))),
+            "read": rnd.choice((None, True, False)),
+        }
+        if rnd.random() < 0.3:
+            query["min_value"] = rnd.randrange(0x8000)
+            query["max_value"] = query["min_value"] + rnd.randrange(0x8000)
+        if rnd.random() < 0.3:
+            query["min_temp"] = rnd.uniform(-200, 200)
+            query["max_temp"] = rnd.choice((None, query["min_temp"] + 500))
+        expected = scan(index, **query)
+        assert list(index.query(**query)) == expected, query
+        found += bool(expected)
+    assert found > 50
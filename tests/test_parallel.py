@@ -0,0 +1,68 @@
+'''
+Decoding with a pool of processes (-j) gives the same output as one process, and the state carried
+between transactions (Hla.get_state / set_state) continues a decode where it was taken.
+'''
+import ast
+
+import pytest
+
+from saleae.analyzers import AnalyzerFrame
+
+import HighLevelAnalyzer as H
+from mcp9600_offline import new_analyzer
+from mcp9600_offline.__main__ import main
+
+from conftest import SETTINGS, settings_id, records, random_frames, write_capture
+
+def run(capture, out, *options):
+    assert main([capture, "-o", str(out), *options]) == 0
+    return out.read_text()
+
+def setting_options(settings):
+    return [option for name, value in settings.items() for option in ("-s", "%s=%s" % (name, value))]
+
+@pytest.mark.parametrize("settings", SETTINGS[:2] + SETTINGS[5:6] + SETTINGS[9:] + SETTINGS[2:3], ids = settings_id)
+def test_jobs_same_output(capture, tmp_path, settings):
+    options = setting_options(settings)
+    sequential = run(capture, tmp_path / "seq.csv", *options)
+    parallel = run(capture, tmp_path / "par.csv", "-j", "2", "--chunk-size", "50000", *options)
+    assert parallel == sequential
+
+def test_jobs_jsonl(capture, tmp_path):
+    sequential = run(capture, tmp_path / "seq.jsonl", "-f", "jsonl")
+    parallel = run(capture, tmp_path / "par.jsonl", "-f", "jsonl", "-j", "3", "--chunk-size", "20000")
+    assert parallel == sequential
+
+@pytest.mark.parametrize("settings", SETTINGS, ids = settings_id)
+def test_state_round_trip(frames, settings):
+    ''' stop, get_state, a new analyzer with that state decodes the rest the same '''
+    hla = new_analyzer(settings)
+    expected = records(list(hla.decode_many(frames)) + hla.flush())
+
+    stops = [i + 1 for i, frame in enumerate(frames) if frame.type == "stop"]
+    for cut in stops[100::400]:
+        first = new_analyzer(settings)
+        out = list(first.decode_many(frames[:cut]))
+
+        # the state is a literal, as stored in a checkpoint file
+        state = first.get_state()
+        assert ast.literal_eval(repr(state)) == state
+
+        second = new_analyzer(settings)
+        second.set_state(ast.literal_eval(repr(state)))
+        assert second.get_state() == state
+
+        out += list(second.decode_many(frames[cut:])) + second.flush()
+        assert records(out) == expected
+
+def test_jobs_two_analyzers(frames, tmp_path):
+    ''' an export of two I2C analyzers, rows interleaved in time: the chunks end on a stop of the decoded analyzer '''
+    other = [AnalyzerFrame(f.type, f.start_time + 45e-6, f.end_time + 45e-6, f.data) for f in random_frames(seed = 2)]
+    rows = sorted([(f.start_time, 0, f) for f in frames] + [(f.start_time, 1, f) for f in other], key = lambda row: row[:2])
+    capture = str(tmp_path / "two.csv")
+    write_capture([f for _, _, f in rows], capture, ["I2C2" if n else "I2C" for _, n, _ in rows])
+
+    for options in ([], ["-s", "read_frames=%s" % H.READ_MERGED]):
+        sequential = run(capture, tmp_path / "seq.csv", "--analyzer", "I2C", *options)
+        parallel = run(capture, tmp_path / "par.csv", "--analyzer", "I2C", "-j", "2", "--chunk-size", "20000", *options)
+        assert parallel == sequential
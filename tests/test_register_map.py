@@ -0,0 +1,65 @@
+'''
+The decoders compiled from the register map give the same text as the decoders of version 1.0.1
+(reference_hla.py), and Hla.describe() of a raw fields frame gives the text of the decoded frame.
+'''
+import pytest
+
+from saleae.analyzers import AnalyzerFrame
+
+import HighLevelAnalyzer as H
+from mcp9600_offline import new_analyzer
+
+import reference_hla
+from conftest import records
+
+def write_values(hla, register, values):
+    ''' a register write per value (list of data bytes), frames out '''
+    out = []
+    for value in values:
+        frames = [AnalyzerFrame("address", 0, 1, {"address": b"\x60", "read": False, "ack": True}),
+                  AnalyzerFrame("data", 1, 2, {"data": bytes((register,))})]
+        frames += [AnalyzerFrame("data", 2, 3, {"data": bytes((byte,))}) for byte in value]
+        frames.append(AnalyzerFrame("stop", 3, 4, {}))
+        out += [hla.decode(frame) for frame in frames]
+    return records(out)
+
+# every byte value as 1 byte, with a second byte and with a third byte
+VALUES = [[x] for x in range(256)] + [[x, 255 - x] for x in range(256)] + [[x, x ^ 0x5a, 7] for x in range(0, 256, 3)]
+
+@pytest.mark.parametrize("register", list(range(0x22)) + [0x30], ids = hex)
+def test_same_text_as_reference(register):
+    expected = write_values(reference_hla.Hla(), register, VALUES)
+    assert write_values(new_analyzer(), register, VALUES) == expected
+
+def test_temperatures():
+    ''' the sign of the junction temperatures is bit 15 '''
+    assert H.junc_temp(0x0190) == 25.0
+    assert H.junc_temp(0x12c0) == 300.0
+    assert H.junc_temp(0xff00) == -16.0
+    assert H.junc_temp(0xffff) == -0.0625
+
+def test_describe_fields(frames):
+    ''' the text Hla.describe() makes of a raw fields frame is the text of the decoded frame '''
+    text = new_analyzer()
+    fields = new_analyzer({"frame_text": H.TEXT_FIELDS})
+
+    checked = 0
+    for frame in frames:
+        a = records([text.decode(frame)])
+        b = [fields.decode(frame)]
+        b = [f for f in (b[0] if isinstance(b[0], list) else b) if f is not None]
+        assert len(a) == len(b)
+
+        for decoded, field in zip(a, b):
+            if decoded[0] != "hi2c":
+                continue
+            data = dict(decoded[3])
+            description = data["description"]
+            if description.startswith("Responds:, "):
+                description = description[len("Responds:, "):]
+            if "error" in description:
+                continue
+            assert fields.describe(field) == (description, data["action"])
+            checked += 1
+
+    assert checked > 1000
@@ -0,0 +1,299 @@
+'''
+What the settings do with small made up transactions (register reads of one or more devices) and with the
+random traffic, decoded frame by frame.
+'''
+import pytest
+
+from saleae.analyzers import AnalyzerFrame
+
+import HighLevelAnalyzer as H
+from mcp9600_offline import new_analyzer
+
+from conftest import settings_id, records
+
+class Bus:
+    ''' I2C frames of transactions, 10 us per frame, 1 ms between transactions '''
+    def __init__(self):
+        self.frames = []
+        self.time = 0.0
+
+    def add(self, type, **data):
+        self.frames.append(AnalyzerFrame(type, self.time, self.time + 9e-6, data))
+        self.time += 10e-6
+
+    def transaction(self, address, read, values):
+        self.add("start")
+        self.add("address", address = bytes((address,)), read = read, ack = True)
+        for value in values:
+            self.add("data", data = bytes((value,)), ack = True)
+        self.add("stop")
+        self.time += 1e-3
+
+    def request(self, address, register):
+        self.transaction(address, False, [register])
+
+    def responds(self, address, *values):
+        self.transaction(address, True, values)
+
+    def write(self, address, register, *values):
+        self.transaction(address, False, [register, *values])
+
+    def read(self, address, register, *values):
+        self.request(address, register)
+        self.responds(address, *values)
+
+def decode(bus, settings = None):
+    hla = new_analyzer(settings)
+    return records([hla.decode(frame) for frame in bus.frames] + hla.flush())
+
+def described(out):
+    return [(t, dict(data).get("address"), dict(data).get("description")) for t, _, _, data in out]
+
+def temp(celsius):
+    ''' the 2 data bytes of a junction temperature '''
+    raw = int(celsius * 16) & 0xffff
+    return raw >> 8, raw & 0xff
+
+def assert_no_overlap(out):
+    for a, b in zip(out, out[1:]):
+        assert b[1] >= a[2], (a, b)
+
+@pytest.mark.parametrize("mode", [H.SUMMARY_ALONGSIDE, H.SUMMARY_INSTEAD])
+def test_summary(mode):
+    bus = Bus()
+    for celsius in (20, 21, 22, 23, 24, 25):
+        bus.read(0x60, H.HOT_JUNC_TEMP, *temp(celsius))
+        bus.read(0x60, H.SENSOR_STATUS, 0x40)
+    out = decode(bus, {"summary": mode, "summary_reads": 3})
+    assert_no_overlap(out)
+
+    summaries = [dict(data) for type, _, _, data in out if type == "summary"]
+    assert [(s["samples"], s["min"], s["max"]) for s in summaries] == [(3, 20.0, 22.0), (3, 23.0, 25.0)]
+    assert summaries[0]["register"] == "HOT_JUNC_TEMP" and summaries[0]["address"] == "0x60"
+
+    texts = [d for _, _, d in described(out) if d is not None]
+    reads = [d for d in texts if "HOT_JUNC_TEMP" in d]
+    if mode == H.SUMMARY_ALONGSIDE:
+        # every read is shown, with the summary after the 3rd and the 6th read
+        assert len(reads) == 12
+        types = [type for type, _, _, _ in out]
+        assert [types[i - 1] for i, type in enumerate(types) if type == "summary"] == ["hi2c", "hi2c"]
+    else:
+        # no temperature read and no read request of it, the SENSOR_STATUS reads are shown
+        assert reads == []
+        assert len([d for d in texts if "SENSOR_STATUS" in d]) == 12
+
+def test_summary_instead_merged():
+    ''' instead of reads with merged reads: the held read request is dropped with the read '''
+    bus = Bus()
+    for celsius in (20, 21, 22):
+        bus.read(0x60, H.HOT_JUNC_TEMP, *temp(celsius))
+    out = decode(bus, {"summary": H.SUMMARY_INSTEAD, "summary_reads": 3, "read_frames": H.READ_MERGED})
+    assert [type for type, _, _, _ in out] == ["summary"]
+
+@pytest.mark.parametrize("filters", [{"address_filter": "0x60"}, {"registers_exclude": "SENSOR_STATUS"}, {}], ids = settings_id)
+def test_windows_no_overlap(frames, filters):
+    ''' bus metrics and decode stats windows with transactions that are skipped: no frames overlap '''
+    hla = new_analyzer({"metrics_interval": 0.01, "stats_interval": 0.01, "read_frames": H.READ_MERGED, **filters})
+    out = records([hla.decode(frame) for frame in frames] + hla.flush())
+
+    # the report of the whole capture covers all frames
+    out = [r for r in out if r[0] != "metrics_report"]
+    assert len([r for r in out if r[0] == "metrics"]) > 10
+    assert len([r for r in out if r[0] == "stats"]) > 10
+    assert_no_overlap(out)
+
+def interleaved(rounds = 2):
+    ''' two sensors polled interleaved: request A, request B, responds A, responds B '''
+    bus = Bus()
+    for _ in range(rounds):
+        bus.request(0x60, H.HOT_JUNC_TEMP)
+        bus.request(0x61, H.DEVICE_ID)
+        bus.responds(0x60, *temp(25.5))
+        bus.responds(0x61, 0x40, 0x21)
+    return bus
+
+@pytest.mark.parametrize("settings", [{}, {"read_frames": H.READ_MERGED}], ids = settings_id)
+def test_interleaved_devices(settings):
+    ''' every address has its own read request register, a responds is decoded as the register its device was asked '''
+    out = described(decode(interleaved(), settings))
+
+    # merged: only one read request is held on the bus, the requests are shown on their own
+    assert out == 2 * [
+        ("read", "0x60", "Obtain , HOT_JUNC_TEMP: "),
+        ("read", "0x61", "Obtain , DEVICE_ID: "),
+        ("hi2c", "0x60", "Responds:, HOT_JUNC_TEMP: , Temp: 25.50°C"),
+        ("hi2c", "0x61", "Responds:, DEVICE_ID: 0x40, Maj: 0x2, Min: 0x1"),
+    ]
+
+def test_merged_per_device():
+    ''' merged: a read request is merged with the responds of its own device only '''
+    bus = Bus()
+    bus.request(0x60, H.HOT_JUNC_TEMP)
+    bus.read(0x61, H.DEVICE_ID, 0x40, 0x21)
+    bus.responds(0x60, *temp(-12.25))
+    out = described(decode(bus, {"read_frames": H.READ_MERGED}))
+    assert out == [
+        ("read", "0x60", "Obtain , HOT_JUNC_TEMP: "),
+        ("readreg", "0x61", "Read:, DEVICE_ID: 0x40, Maj: 0x2, Min: 0x1"),
+        ("hi2c", "0x60", "Responds:, HOT_JUNC_TEMP: , Temp: -12.25°C"),
+    ]
+
+def test_changes_deadband():
+    bus = Bus()
+    for celsius in (25.0, 25.25, 25.5, 25.0, 26.0, 26.0, 25.75):
+        bus.read(0x60, H.HOT_JUNC_TEMP, *temp(celsius))
+    out = decode(bus, {"emit_frames": H.EMIT_CHANGES, "deadband": 0.5})
+
+    # 25.25, 25.5 and 25.0 are within 0.5 °C of the 25.0 shown, 26.0 and 25.75 of the 26.0 shown
+    assert [(type, dict(data).get("description")) for type, _, _, data in out] == [
+        ("read", "Obtain , HOT_JUNC_TEMP: "),
+        ("hi2c", "Responds:, HOT_JUNC_TEMP: , Temp: 25.00°C"),
+        ("read", "Obtain , HOT_JUNC_TEMP: "),
+        ("change", "Responds:, HOT_JUNC_TEMP: , Temp: 26.00°C"),
+        ("repeat", None),
+    ]
+    change, repeat = dict(out[3][3]), dict(out[4][3])
+    assert (change["previous"], change["repeats"]) == ("0x190", 3)
+    assert (repeat["data"], repeat["repeats"]) == ("0x1a0", 2)
+
+    # without deadband only the second 26.0 is not shown
+    out = decode(bus, {"emit_frames": H.EMIT_CHANGES})
+    assert [type for type, _, _, _ in out if type != "read"] == ["hi2c"] * 5 + ["change"]
+
+def assert_requests_paired(out):
+    ''' every read request shown is followed by the responds of its device '''
+    for i, (type, _, _, data) in enumerate(out):
+        if type == "read":
+            address = dict(data)["address"]
+            following = [t for t, _, _, d in out[i + 1:] if dict(d).get("address") == address]
+            assert following and following[0] in ("hi2c", "change"), out[i:]
+
+@pytest.mark.parametrize("settings", [{"emit_frames": H.EMIT_CHANGES},
+                                      {"emit_frames": H.EMIT_CHANGES, "read_frames": H.READ_MERGED},
+                                      {"summary": H.SUMMARY_INSTEAD, "summary_reads": 2}], ids = settings_id)
+def test_interleaved_unpaired_requests(settings):
+    ''' changes only / summary only with interleaved devices: no read request is shown without its responds '''
+    out = decode(interleaved(4), settings)
+    assert_requests_paired(out)
+    assert len([type for type, _, _, _ in out if type in ("hi2c", "change", "summary")]) >= 2
+
+def test_changes_random_traffic(frames):
+    hla = new_analyzer({"emit_frames": H.EMIT_CHANGES})
+    out = records([hla.decode(frame) for frame in frames])
+    assert_requests_paired(out)
+    assert_no_overlap(out)
+
+def shadow_bus():
+    bus = Bus()
+    bus.read(0x60, H.RAW_ADC, 0xff, 0xff, 0xfe)
+    bus.write(0x60, H.DEVICE_CONFIG, 0x20)             # 16 bit ADC
+    bus.read(0x60, H.RAW_ADC, 0xff, 0xff, 0xfe)
+    bus.read(0x60, H.DEVICE_CONFIG, 0x20)
+    bus.read(0x60, H.DEVICE_CONFIG, 0x60)               # 12 bit, not what was written
+    bus.read(0x60, H.RAW_ADC, 0x00, 0x01, 0x00)
+    bus.read(0x61, H.DEVICE_CONFIG, 0x60)               # other device, no shadow yet
+    return bus
+
+def test_shadow():
+    out = [dict(data) for type, _, _, data in decode(shadow_bus()) if type == "hi2c"]
+
+    # RAW_ADC in µV once the ADC resolution is known, sign-extended
+    assert [d["description"] for d in out if "RAW_ADC" in d["description"]] == [
+        "Responds:, RAW_ADC: Raw: 16777214",
+        "Responds:, RAW_ADC: Raw: 16777214, -16µV (16 bit)",
+        "Responds:, RAW_ADC: Raw: 256, 32768µV (12 bit)",
+    ]
+    differs = [(d["address"], d["data"]) for d in out if "Differs from shadow: 0x20" in d["action"]]
+    assert differs == [("0x60", "0x60")]
+    assert sum("Differs" in d["action"] for d in out) == 1
+
+def test_shadow_fields():
+    out = [dict(data) for type, _, _, data in decode(shadow_bus(), {"frame_text": H.TEXT_FIELDS}) if type == "field"]
+    assert [(d.get("uv"), d.get("resolution")) for d in out if d["register"] == "RAW_ADC"] == [(None, None), (-16.0, 16), (32768.0, 12)]
+    assert [(d["address"], d["data"], d["expected"]) for d in out if "expected" in d] == [("0x60", 0x60, 0x20)]
+
+def test_metrics():
+    bus = Bus()
+    for i in range(4):
+        bus.read(0x60, H.SENSOR_STATUS, 0x40)                      # conversion complete
+        bus.read(0x60, H.HOT_JUNC_TEMP, *temp(25.0 if i < 3 else 26.0))
+    bus.time += 0.1
+    bus.read(0x60, H.SENSOR_STATUS, 0x00)
+    out = decode(bus, {"metrics_interval": 0.05})
+    assert_no_overlap([r for r in out if r[0] != "metrics_report"])
+
+    metrics = [(start, end, dict(data)) for type, start, end, data in out if type == "metrics"]
+    assert len(metrics) == 2
+
+    # the first window is shown in the idle time before the last read request
+    start, end, window = metrics[0]
+    assert end == bus.frames[-8].start_time
+    assert (window["transactions"], window["reads"], window["unchanged"]) == (16, 8, 5)
+    assert window["unchanged_pct"] == 62.5
+
+    # a read request and stop 39 us, a responds 39 us + 10 us per data byte more than 1
+    busy = 4 * (39e-6 + 39e-6) + 4 * (39e-6 + 49e-6)
+    assert window["occupancy"] == pytest.approx(100 * busy / window["span"], abs = 1e-4)
+
+    # end of the SENSOR_STATUS responds to the HOT_JUNC_TEMP read request: 1 us after the stop + 1 ms
+    assert window["latency_count"] == 4
+    assert window["latency_mean"] == window["latency_max"] == pytest.approx(1.001, abs = 1e-3)
+    rate = "{:.1f}/s".format(4 / window["span"])
+    assert window["polling"] == "HOT_JUNC_TEMP " + rate + ", SENSOR_STATUS " + rate
+    assert window["description"].startswith("16 transactions, bus 0.57%, 8 reads, 62.5% unchanged, ready to read 1.001 ms")
+
+    # the last window at the end, the report of the whole capture
+    assert (metrics[1][2]["transactions"], metrics[1][2]["latency_count"]) == (2, 0)
+    report = [dict(data) for type, _, _, data in out if type == "metrics_report"]
+    assert [(r["transactions"], r["reads"], r["unchanged"]) for r in report] == [(18, 9, 5)]
+
+def filter_bus():
+    ''' two sensors polled interleaved, a device at 0x20 and a register write in between '''
+    bus = Bus()
+    bus.request(0x60, H.HOT_JUNC_TEMP)
+    bus.request(0x61, H.SENSOR_STATUS)
+    bus.responds(0x60, *temp(25.0))
+    bus.responds(0x61, 0x40)
+    bus.request(0x60, H.SENSOR_STATUS)
+    bus.request(0x61, H.HOT_JUNC_TEMP)
+    bus.responds(0x60, 0x40)
+    bus.responds(0x61, *temp(-3.0))
+    bus.read(0x20, H.THERMO_SENSOR_CONFIG, 0x11)
+    bus.read(0x60, H.DEVICE_ID, 0x40, 0x21)
+    bus.write(0x60, H.SENSOR_STATUS, 0x00)
+    bus.read(0x61, H.COLD_JUNC_TEMP, *temp(21.5))
+    return bus
+
+HOT_25 = "HOT_JUNC_TEMP: , Temp: 25.00°C"
+HOT_MINUS_3 = "HOT_JUNC_TEMP: , Temp: -3.00°C"
+DEVICE_ID = "DEVICE_ID: 0x40, Maj: 0x2, Min: 0x1"
+COLD_21 = "COLD_JUNC_TEMP: , Temp: 21.50°C"
+
+@pytest.mark.parametrize("settings, expected", [
+    # the transactions of the other addresses are skipped, the requests of 0x60 are merged with their responds
+    ({"address_filter": "0x60", "read_frames": H.READ_MERGED}, [
+        ("readreg", "0x60", "Read:, " + HOT_25),
+        ("readreg", "0x60", "Read:, SENSOR_STATUS: "),
+        ("readreg", "0x60", "Read:, " + DEVICE_ID),
+        ("hi2c", "0x60", "SENSOR_STATUS: "),
+    ]),
+    # a request of a register that is filtered out skips its responds, no other read request is released
+    ({"registers_exclude": "SENSOR_STATUS", "read_frames": H.READ_MERGED}, [
+        ("readreg", "0x60", "Read:, " + HOT_25),
+        ("readreg", "0x61", "Read:, " + HOT_MINUS_3),
+        ("readreg", "0x20", "Read:, THERMO_SENSOR_CONFIG: , Type: TYPE_J, filter(1)"),
+        ("readreg", "0x60", "Read:, " + DEVICE_ID),
+        ("readreg", "0x61", "Read:, " + COLD_21),
+    ]),
+    ({"registers_include": "HOT_JUNC_TEMP COLD_JUNC_TEMP", "address_filter": "MCP9600 (0x60 - 0x67)"}, [
+        ("read", "0x60", "Obtain , HOT_JUNC_TEMP: "),
+        ("hi2c", "0x60", "Responds:, " + HOT_25),
+        ("read", "0x61", "Obtain , HOT_JUNC_TEMP: "),
+        ("hi2c", "0x61", "Responds:, " + HOT_MINUS_3),
+        ("read", "0x61", "Obtain , COLD_JUNC_TEMP: "),
+        ("hi2c", "0x61", "Responds:, " + COLD_21),
+    ]),
+], ids = ["address", "exclude", "include"])
+def test_filters(settings, expected):
+    assert described(decode(filter_bus(), settings)) == expected
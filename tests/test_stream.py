@@ -0,0 +1,30 @@
+'''
+Frames replayed by the stand-in producer over a pipe and decoded live give the output of the offline decoder.
+'''
+import os
+import subprocess
+import sys
+
+import pytest
+
+import HighLevelAnalyzer as H
+from mcp9600_offline.__main__ import main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize("options", [[], ["-s", "read_frames=%s" % H.READ_MERGED]], ids = ["default", "merged"])
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_pipe(capture, tmp_path, fmt, options):
+    offline = tmp_path / ("offline." + fmt)
+    assert main([capture, "-f", fmt, "-o", str(offline), *options]) == 0
+
+    live = tmp_path / ("live." + fmt)
+    producer = subprocess.Popen([sys.executable, "-m", "mcp9600_offline.stream", "produce", capture],
+                                cwd = ROOT, stdout = subprocess.PIPE)
+    decoder = subprocess.run([sys.executable, "-m", "mcp9600_offline.stream", "decode", "-", "-f", fmt, "-o", str(live), *options],
+                             cwd = ROOT, stdin = producer.stdout, timeout = 120)
+    producer.stdout.close()
+    assert producer.wait(timeout = 120) == 0
+    assert decoder.returncode == 0
+
+    assert live.read_text() == offline.read_text()